@@ -1,23 +1,47 @@
 """The Google Maps Weather integration."""
 from __future__ import annotations
 
-import asyncio
 import logging
 from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.start import async_at_started
 
 from .const import (
-    CONF_UPDATE_INTERVAL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_GRID_RESOLUTION,
+    CONF_LATITUDE,
+    CONF_LOCATION_ID,
+    CONF_LONGITUDE,
     CONF_HOURLY_FORECAST_HOURS,
-    DEFAULT_UPDATE_INTERVAL,
+    DEFAULT_GRID_RESOLUTION,
     DEFAULT_HOURLY_FORECAST_HOURS,
     DOMAIN,
+    MINUTES_PER_MONTH,
+    STARTUP_REFRESH_MAX_DELAY,
 )
+from .adaptive import async_get_budget
 from .api import GoogleMapsWeatherAPI
+from .cache import ResponseCache, async_remove_cache
+from .metrics import PerformanceMetrics
+from .fields import build_field_masks
+from .grid import async_get_grid, snap_coordinate
+from .coordinator import (
+    GoogleMapsWeatherCoordinator,
+    get_adaptive_budget,
+    get_calls_per_fetch,
+    get_effective_intervals,
+    get_locations,
+    get_refresh_interval,
+    get_unique_prefix,
+)
+from .resilience import async_get_breaker
+from .scheduler import RefreshScheduler
+from .transport import async_get_transport, async_release_transport
+from .usage import async_get_usage
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,74 +51,182 @@ PLATFORMS: list[Platform] = [Platform.WEATHER, Platform.SENSOR]
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Google Maps Weather from a config entry."""
     api_key = entry.data["api_key"]
-    latitude = entry.data["latitude"]
-    longitude = entry.data["longitude"]
-    update_interval = entry.data.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
     hourly_forecast_hours = entry.data.get(CONF_HOURLY_FORECAST_HOURS, DEFAULT_HOURLY_FORECAST_HOURS)
-    
-    api = GoogleMapsWeatherAPI(api_key, latitude, longitude)
-    
-    # Crear coordinador para gestionar las actualizaciones
-    async def async_update_data():
-        """Fetch data from API."""
-        try:
-            # Ejecutar las 3 llamadas en paralelo para optimizar tiempo de respuesta
-            current, forecast_daily, forecast_hourly = await asyncio.gather(
-                api.get_current_conditions(),
-                api.get_daily_forecast(),
-                api.get_hourly_forecast(hours=hourly_forecast_hours)
+    locations = get_locations(entry)
+
+    # Todas las entradas comparten el mismo pool de conexiones
+    transport = async_get_transport(hass)
+    transport.acquire(entry.entry_id)
+    try:
+        # Últimas respuestas guardadas en disco: lo que siga fresco tras un
+        # reinicio se sirve sin llamar a la API
+        cache = ResponseCache(hass, entry.entry_id)
+        await cache.async_load(location[CONF_LOCATION_ID] for location in locations)
+
+        # Contadores reales de llamadas, compartidos por todas las entradas
+        usage = await async_get_usage(hass)
+        # Las entradas con la misma clave comparten también el circuit breaker
+        breaker = async_get_breaker(hass, api_key)
+
+        # Métricas de rendimiento comunes a todas las ubicaciones de la entrada
+        metrics = PerformanceMetrics()
+
+        # En modo adaptativo todas las ubicaciones, y las entradas con la misma
+        # clave, comparten un presupuesto mensual
+        budget = (
+            await async_get_budget(hass, api_key, get_adaptive_budget(entry))
+            if entry.data.get(CONF_ADAPTIVE_POLLING)
+            else None
+        )
+
+        # Solo se piden los campos que leen las entidades
+        field_masks = build_field_masks()
+
+        # Las ubicaciones cercanas, de cualquier entrada, comparten la celda de la
+        # rejilla y con ella las llamadas a la API
+        grid = async_get_grid(hass)
+        grid_resolution = entry.data.get(CONF_GRID_RESOLUTION, DEFAULT_GRID_RESOLUTION)
+
+        # Un coordinador por ubicación, refrescados por un único planificador
+        coordinators: dict[str, GoogleMapsWeatherCoordinator] = {}
+        for location in locations:
+            api = GoogleMapsWeatherAPI(
+                transport.session,
+                api_key,
+                snap_coordinate(location[CONF_LATITUDE], grid_resolution),
+                snap_coordinate(location[CONF_LONGITUDE], grid_resolution),
+                metrics=metrics,
+                usage=usage,
+                breaker=breaker,
+                field_masks=field_masks,
+                coalescer=transport.coalescer,
+            )
+            coordinator = GoogleMapsWeatherCoordinator(
+                hass, entry, location, api, cache, metrics, budget, grid
             )
-            
-            _LOGGER.debug(
-                "Datos obtenidos: condiciones actuales, pronóstico diario y horario (%s horas)",
-                hourly_forecast_hours
+            coordinators[coordinator.location_id] = coordinator
+            entry.async_on_unload(
+                grid.async_add_location(
+                    coordinator.cell, coordinator.unique_prefix, coordinator.async_grid_updated
+                )
             )
-            
-            return {
-                "current": current,
-                "forecast": forecast_daily,
-                "hourly": forecast_hourly
-            }
-        except Exception as err:
-            raise UpdateFailed(f"Error communicating with API: {err}")
-    
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=async_update_data,
-        update_interval=timedelta(minutes=update_interval),
+
+        # Cada ubicación se refresca al ritmo del endpoint más frecuente; en cada
+        # refresco solo se piden los endpoints cuyo intervalo ha vencido
+        scheduler = RefreshScheduler(hass, timedelta(minutes=get_refresh_interval(entry)))
+        scheduler.async_add(coordinators.values())
+        # Las conexiones ociosas aguantan hasta el slot de la ubicación siguiente
+        transport.set_request_gap(entry.entry_id, scheduler.max_gap)
+
+        # Las entidades arrancan con los últimos datos guardados; el arranque no
+        # espera a la red
+        restored = sum(coordinator.async_restore() for coordinator in coordinators.values())
+        _LOGGER.debug(
+            "Restaurados los datos de %s de %s ubicaciones", restored, len(coordinators)
+        )
+
+        # Guardar los coordinadores en hass.data
+        hass.data.setdefault(DOMAIN, {})
+        hass.data[DOMAIN][entry.entry_id] = {
+            "coordinators": coordinators,
+            "scheduler": scheduler,
+            "cache": cache,
+            "transport": transport,
+            "metrics": metrics,
+            "budget": budget,
+            "usage": usage,
+            "breaker": breaker,
+            "grid": grid,
+        }
+
+        # Las ubicaciones eliminadas no dejan dispositivos ni entidades
+        _async_remove_stale_devices(hass, entry)
+
+        # Configurar las plataformas
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except Exception:
+        # Una entrada que no llega a cargarse no se descarga: se suelta aquí
+        hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        await async_release_transport(hass, entry.entry_id)
+        raise
+
+    scheduler.async_start()
+    entry.async_on_unload(scheduler.async_stop)
+
+    @callback
+    def _async_first_refresh(_hass: HomeAssistant) -> None:
+        """Fetch the live data once Home Assistant has started."""
+        scheduler.async_schedule_first_refresh(STARTUP_REFRESH_MAX_DELAY)
+
+    entry.async_on_unload(async_at_started(hass, _async_first_refresh))
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    # Log de los intervalos configurados (una llamada por endpoint y ubicación)
+    effective_intervals = get_effective_intervals(entry)
+    calls_per_fetch = get_calls_per_fetch(entry)
+    monthly_calls = int(
+        len(locations)
+        * sum(
+            calls_per_fetch[endpoint] * MINUTES_PER_MONTH / interval
+            for endpoint, interval in effective_intervals.items()
+        )
     )
-    
-    # Obtener los datos iniciales
-    await coordinator.async_config_entry_first_refresh()
-    
-    # Guardar el coordinador en hass.data
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {
-        "coordinator": coordinator,
-        "api": api,
-    }
-    
-    # Configurar las plataformas
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    
-    # Log del intervalo configurado (ahora con 3 llamadas por actualización)
-    monthly_calls = int(3 * (60 * 24 * 30) / update_interval)
     _LOGGER.info(
-        "Google Maps Weather configurado: %s minutos de actualización, "
-        "%s horas de pronóstico horario (~%s llamadas/mes con 3 endpoints)",
-        update_interval,
+        "Google Maps Weather configurado: %s ubicaciones, intervalos (min) %s, "
+        "%s horas de pronóstico horario (~%s llamadas/mes)",
+        len(locations),
+        effective_intervals,
         hourly_forecast_hours,
         monthly_calls
     )
-    
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
-    
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["cache"].async_flush()
+        # Cerrar el transporte compartido cuando ya no queda ninguna entrada
+        await async_release_transport(hass, entry.entry_id)
+
     return unload_ok
+
+
+async def async_remove_config_entry_device(
+    hass: HomeAssistant, entry: ConfigEntry, device_entry: dr.DeviceEntry
+) -> bool:
+    """Allow removing the device of a location that is no longer configured."""
+    return not _location_identifiers(entry) & device_entry.identifiers
+
+
+@callback
+def _async_remove_stale_devices(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the devices, and with them the entities, of removed locations."""
+    identifiers = _location_identifiers(entry)
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if not identifiers & device.identifiers:
+            _LOGGER.debug("Eliminando el dispositivo de una ubicación borrada: %s", device.name)
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
+
+
+def _location_identifiers(entry: ConfigEntry) -> set[tuple[str, str]]:
+    """Return the device identifiers of the configured locations."""
+    return {
+        (DOMAIN, get_unique_prefix(entry, location[CONF_LOCATION_ID]))
+        for location in get_locations(entry)
+    }
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its locations or options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached responses of a deleted entry."""
+    await async_remove_cache(hass, entry.entry_id)
@@ -0,0 +1,222 @@
+"""Weather-aware adaptive polling for Google Maps Weather."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ADAPTIVE_CHANGING_PRECIPITATION_RISE,
+    ADAPTIVE_CHANGING_TEMPERATURE_SWING,
+    ADAPTIVE_CHANGING_THUNDERSTORM,
+    ADAPTIVE_LOOKAHEAD_HOURS,
+    ADAPTIVE_STABLE_PRECIPITATION,
+    ADAPTIVE_STABLE_TEMPERATURE_SWING,
+    ADAPTIVE_STORM_THUNDERSTORM,
+    BUDGET_CAPACITY_DAYS,
+    BUDGET_SAVE_DELAY,
+    BUDGET_STORAGE_KEY,
+    BUDGET_STORAGE_VERSION,
+    CONDITIONS_CHANGING,
+    CONDITIONS_NORMAL,
+    CONDITIONS_STABLE,
+    CONDITIONS_STORM,
+    DATA_BUDGETS,
+    DOMAIN,
+    MINUTES_PER_MONTH,
+)
+from .forecast import ForecastSnapshot
+from .usage import key_id
+
+_LOGGER = logging.getLogger(__name__)
+
+# Campos de las condiciones actuales que usa assess_conditions
+CURRENT_FIELDS = ("thunderstormProbability", "precipitation.probability.percent")
+
+
+def assess_conditions(
+    current: dict[str, Any], forecast: ForecastSnapshot | None, now: datetime
+) -> str:
+    """Classify how fast the weather of a location is changing.
+
+    current is the flattened current conditions; the hourly forecast of the
+    next hours gives the precipitation trend and the temperature swing.
+    """
+    thunderstorm = current.get("thunderstormProbability") or 0
+    precipitation = current.get("precipitation.probability.percent") or 0
+
+    hours = (
+        forecast.hourly_forecast(now, ADAPTIVE_LOOKAHEAD_HOURS) or []
+        if forecast is not None
+        else []
+    )
+    precipitation_max = max(
+        (hour.get("precipitation_probability") or 0 for hour in hours),
+        default=precipitation,
+    )
+    temperatures = [
+        hour["native_temperature"]
+        for hour in hours
+        if hour.get("native_temperature") is not None
+    ]
+    swing = max(temperatures) - min(temperatures) if temperatures else 0
+
+    if thunderstorm >= ADAPTIVE_STORM_THUNDERSTORM:
+        return CONDITIONS_STORM
+    if (
+        thunderstorm >= ADAPTIVE_CHANGING_THUNDERSTORM
+        or precipitation_max - precipitation >= ADAPTIVE_CHANGING_PRECIPITATION_RISE
+        or swing >= ADAPTIVE_CHANGING_TEMPERATURE_SWING
+    ):
+        return CONDITIONS_CHANGING
+    if (
+        max(precipitation, precipitation_max) < ADAPTIVE_STABLE_PRECIPITATION
+        and swing < ADAPTIVE_STABLE_TEMPERATURE_SWING
+    ):
+        return CONDITIONS_STABLE
+    return CONDITIONS_NORMAL
+
+
+class CallBudget:
+    """Token bucket spreading a monthly call budget evenly over time.
+
+    Tokens are added continuously at budget / month and each call spends one,
+    so calls saved while the weather is stable can be spent during a storm
+    without the monthly total going over budget. At most one day of budget
+    can be saved.
+    """
+
+    def __init__(
+        self,
+        monthly_calls: int,
+        state: dict[str, float] | None = None,
+        on_change: Callable[[], None] | None = None,
+    ) -> None:
+        """Initialize the budget from a stored state, or half full.
+
+        on_change is called whenever tokens are spent.
+        """
+        self.set_monthly_calls(monthly_calls)
+        self._on_change = on_change
+        if state:
+            self._tokens = min(state["tokens"], self.capacity)
+            self._updated = state["updated"]
+        else:
+            self._tokens = self.capacity / 2
+            self._updated = dt_util.utcnow().timestamp()
+
+    def set_monthly_calls(self, monthly_calls: int) -> None:
+        """Change the monthly budget, keeping the tokens saved."""
+        self.monthly_calls = monthly_calls
+        self.rate = monthly_calls / (MINUTES_PER_MONTH * 60)
+        self.capacity = max(monthly_calls * BUDGET_CAPACITY_DAYS / 30, 1.0)
+
+    @property
+    def tokens(self) -> float:
+        """Return the tokens available now."""
+        now = dt_util.utcnow().timestamp()
+        self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.capacity)
+        self._updated = now
+        return self._tokens
+
+    def try_consume(self, calls: int = 1) -> bool:
+        """Spend a token per call if there are enough for all of them."""
+        if self.tokens < calls:
+            return False
+        self._tokens -= calls
+        self._changed()
+        return True
+
+    def consume(self, calls: int = 1) -> None:
+        """Spend a token per call even if there are not enough.
+
+        Used when there is no data at all to fall back on; the debt is paid
+        back before any other call is allowed.
+        """
+        self._tokens = self.tokens - calls
+        self._changed()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the budget."""
+        return {
+            "monthly_budget": self.monthly_calls,
+            "tokens": round(self.tokens, 2),
+            "capacity": round(self.capacity, 2),
+        }
+
+    def state(self) -> dict[str, float]:
+        """Return what is needed to restore the budget."""
+        return {"tokens": self._tokens, "updated": self._updated}
+
+    def _changed(self) -> None:
+        """Notify that tokens were spent."""
+        if self._on_change is not None:
+            self._on_change()
+
+
+class CallBudgets:
+    """Call budgets of adaptive polling, one per API key, kept on disk.
+
+    Every entry using a key spends from the same bucket, and restarts or
+    reloads find the tokens where they were left instead of a new
+    allowance. Keys are stored hashed.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the budgets."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, BUDGET_STORAGE_VERSION, BUDGET_STORAGE_KEY, private=True
+        )
+        self._stored: dict[str, dict[str, float]] = {}
+        self._budgets: dict[str, CallBudget] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored buckets."""
+        self._stored = await self._store.async_load() or {}
+
+    @callback
+    def async_get(self, api_key: str, monthly_calls: int) -> CallBudget:
+        """Return the budget of an API key with the given monthly calls.
+
+        Entries sharing the key and configured with other monthly calls
+        change the budget of the key to the last one set up.
+        """
+        key = key_id(api_key)
+        if (budget := self._budgets.get(key)) is not None:
+            budget.set_monthly_calls(monthly_calls)
+            return budget
+        budget = self._budgets[key] = CallBudget(
+            monthly_calls, self._stored.get(key), self._async_schedule_save
+        )
+        return budget
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Save the buckets after a while, grouping changes."""
+        self._store.async_delay_save(self._data_to_save, BUDGET_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {
+            **self._stored,
+            **{key: budget.state() for key, budget in self._budgets.items()},
+        }
+
+
+async def async_get_budget(
+    hass: HomeAssistant, api_key: str, monthly_calls: int
+) -> CallBudget:
+    """Return the call budget of an API key, shared by every entry."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (budgets := domain_data.get(DATA_BUDGETS)) is None:
+        budgets = CallBudgets(hass)
+        await budgets.async_load()
+        # Otra llamada pudo crearlo mientras se cargaba
+        budgets = domain_data.setdefault(DATA_BUDGETS, budgets)
+    return budgets.async_get(api_key, monthly_calls)
@@ -1,45 +1,122 @@
 """API client for Google Maps Weather."""
 from __future__ import annotations
 
+import asyncio
+import gzip
+import hashlib
 import logging
+from collections.abc import AsyncIterator
+from functools import partial
+from time import monotonic
 from typing import Any
+import zlib
 
 import aiohttp
+from aiohttp import hdrs
+
+from homeassistant.util.json import json_loads
 
 from .const import (
+    API_MAX_RETRIES,
+    API_RETRY_STATUSES,
+    BREAKER_OPEN,
     CURRENT_CONDITIONS_ENDPOINT,
     DAILY_FORECAST_ENDPOINT,
     HOURLY_FORECAST_ENDPOINT,
     DEFAULT_UNITS,
+    ENDPOINT_CURRENT,
+    ENDPOINT_DAILY,
+    ENDPOINT_HOURLY,
+    HOURLY_MAX_PAGE_SIZE,
 )
+from .metrics import EndpointMetrics, PerformanceMetrics
+from .resilience import CircuitBreaker, parse_retry_after, retry_delay
+from .transport import RequestCoalescer
+from .usage import UsageTracker, key_id
 
 _LOGGER = logging.getLogger(__name__)
 
+# Clave de métricas de cada URL
+_ENDPOINT_KEYS = {
+    CURRENT_CONDITIONS_ENDPOINT: ENDPOINT_CURRENT,
+    DAILY_FORECAST_ENDPOINT: ENDPOINT_DAILY,
+    HOURLY_FORECAST_ENDPOINT: ENDPOINT_HOURLY,
+}
+
+
+def fingerprint(body: bytes) -> str:
+    """Return a short hash identifying a response body."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ApiResponse:
+    """A successful API response, identified by the fingerprint of its body.
+
+    The JSON is only decoded when first asked for, so a response identical
+    to one already in use can be recognized and dropped without decoding
+    it. Callers sharing a coalesced request share the decoded JSON too.
+    """
+
+    def __init__(self, body: bytes, metrics: EndpointMetrics | None = None) -> None:
+        """Initialize the response from its decompressed body."""
+        self.fingerprint = fingerprint(body)
+        # Token de la página siguiente, solo en las páginas del pronóstico horario
+        self.next_page_token: str | None = None
+        self._body = body
+        self._data: dict[str, Any] | None = None
+        self._metrics = metrics
+
+    def json(self) -> dict[str, Any]:
+        """Return the decoded JSON body."""
+        if self._data is None:
+            start = monotonic()
+            # json_loads usa orjson, incluido en Home Assistant
+            self._data = json_loads(self._body)
+            self._body = b""
+            if self._metrics is not None:
+                self._metrics.json_decode.add(monotonic() - start)
+        return self._data
+
 
 class GoogleMapsWeatherAPI:
     """Class to interact with Google Maps Weather API."""
 
     def __init__(
         self, 
+        session: aiohttp.ClientSession,
         api_key: str, 
         latitude: float, 
         longitude: float,
-        units: str = DEFAULT_UNITS
+        units: str = DEFAULT_UNITS,
+        metrics: PerformanceMetrics | None = None,
+        usage: UsageTracker | None = None,
+        breaker: CircuitBreaker | None = None,
+        retries: int = API_MAX_RETRIES,
+        field_masks: dict[str, str] | None = None,
+        coalescer: RequestCoalescer | None = None,
     ) -> None:
-        """Initialize the API client."""
+        """Initialize the API client.
+
+        The session is owned by the shared transport, not by the client.
+        Requests are measured into metrics and counted in usage when given.
+        Transient failures are retried up to retries times and reported to
+        the circuit breaker of the API key. field_masks limits the fields
+        returned by each endpoint. With a coalescer, a request identical to
+        one already in flight joins it instead of being sent.
+        """
         self.api_key = api_key
         self.latitude = latitude
         self.longitude = longitude
         self.units = units
-        self._session = None
-
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session."""
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
-        return self._session
+        self._session = session
+        self.metrics = metrics
+        self.usage = usage
+        self.breaker = breaker
+        self.retries = retries
+        self.field_masks = field_masks or {}
+        self.coalescer = coalescer
 
-    async def _make_request(self, endpoint: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
+    async def _make_request(self, endpoint: str, params: dict[str, Any] | None = None) -> ApiResponse:
         """Make a request to the API."""
         if params is None:
             params = {}
@@ -55,22 +132,142 @@ class GoogleMapsWeatherAPI:
         if "currentConditions" not in endpoint:
             params["unitsSystem"] = self.units
 
-        session = await self._get_session()
-        
+        endpoint_key = _ENDPOINT_KEYS[endpoint]
+        metrics = self.metrics.endpoint(endpoint_key) if self.metrics else None
+        request = partial(self._async_request, endpoint, endpoint_key, params, metrics)
+        if self.coalescer is None:
+            return await request()
+        # La misma petición de otra ubicación o entrada ya en curso se comparte
+        key = self._coalesce_key(endpoint, endpoint_key, params)
+        if key in self.coalescer and metrics is not None:
+            metrics.coalesced += 1
+        return await self.coalescer.async_run(key, request)
+
+    async def _async_request(
+        self,
+        endpoint: str,
+        endpoint_key: str,
+        params: dict[str, Any],
+        metrics: EndpointMetrics | None,
+    ) -> ApiResponse:
+        """Send a request, retrying transient failures."""
+        attempt = 0
+        while True:
+            probe = False
+            if self.breaker is not None:
+                probe = self.breaker.async_before_request()
+            try:
+                response = await self._send(endpoint, endpoint_key, params, metrics)
+            except aiohttp.ClientResponseError as err:
+                if err.status not in API_RETRY_STATUSES:
+                    # La API responde: el error no es transitorio
+                    if self.breaker is not None:
+                        self.breaker.async_record_success()
+                    _LOGGER.error("Error fetching data from Google Maps Weather API: %s", err)
+                    raise
+                failure: Exception = err
+                error = f"HTTP {err.status}"
+                retry_after = parse_retry_after(
+                    err.headers.get("Retry-After") if err.headers else None
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                failure = err
+                error = type(err).__name__
+                retry_after = None
+            except BaseException as err:
+                # Sin resultado (cancelada o error inesperado) la prueba no
+                # puede dejar el breaker medio abierto
+                if probe and self.breaker is not None:
+                    self.breaker.async_release_probe()
+                if isinstance(err, Exception):
+                    _LOGGER.error("Unexpected error: %s", err)
+                raise
+            else:
+                if self.breaker is not None:
+                    self.breaker.async_record_success()
+                return response
+
+            if self.breaker is not None:
+                self.breaker.async_record_failure(error, retry_after)
+            delay = retry_delay(attempt, retry_after) if attempt < self.retries else None
+            if delay is None or (
+                self.breaker is not None and self.breaker.state == BREAKER_OPEN
+            ):
+                _LOGGER.error(
+                    "Error fetching %s from Google Maps Weather API after %s attempts: %s",
+                    endpoint_key,
+                    attempt + 1,
+                    error,
+                )
+                raise failure
+            attempt += 1
+            if metrics is not None:
+                metrics.retries += 1
+            _LOGGER.debug(
+                "%s de %s, reintento %s en %.1f s", error, endpoint_key, attempt, delay
+            )
+            await asyncio.sleep(delay)
+
+    async def _send(
+        self,
+        endpoint: str,
+        endpoint_key: str,
+        params: dict[str, Any],
+        metrics: EndpointMetrics | None,
+    ) -> ApiResponse:
+        """Send one request and return its decompressed response."""
+        # Toda petición que sale cuenta para la facturación, falle o no
+        if self.usage is not None:
+            self.usage.async_record(self.api_key, endpoint_key)
+        status: int | None = None
+        start = monotonic()
         try:
-            async with session.get(endpoint, params=params) as response:
+            async with self._session.get(
+                endpoint, params=params, headers=self._headers(endpoint_key)
+            ) as response:
+                status = response.status
                 response.raise_for_status()
-                data = await response.json()
-                return data
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Error fetching data from Google Maps Weather API: %s", err)
-            raise
-        except Exception as err:
-            _LOGGER.error("Unexpected error: %s", err)
-            raise
+                encoding = response.headers.get(hdrs.CONTENT_ENCODING, "").lower()
+                wire = await response.read()
+            received = monotonic()
+            # El transporte no descomprime: así se conocen los bytes reales
+            body = _decompress(wire, encoding)
+            if metrics is not None:
+                metrics.record_response(received - start, len(wire), len(body))
+            return ApiResponse(body, metrics)
+        finally:
+            if metrics is not None:
+                metrics.record_status(status)
+
+    def _coalesce_key(
+        self, endpoint: str, endpoint_key: str, params: dict[str, Any]
+    ) -> str:
+        """Return what identifies a request among those in flight.
+
+        The API key is only present as its hash: requests sent with another
+        key are billed to it and may fail differently, so they are not shared.
+        """
+        query = "&".join(
+            f"{name}={value}" for name, value in sorted(params.items()) if name != "key"
+        )
+        return (
+            f"{endpoint}?{query}|{key_id(self.api_key)}"
+            f"|{self.field_masks.get(endpoint_key, '')}"
+        )
+
+    def _headers(self, endpoint_key: str) -> dict[str, str]:
+        """Return the headers of a request to an endpoint."""
+        headers = {hdrs.ACCEPT_ENCODING: "gzip"}
+        if mask := self.field_masks.get(endpoint_key):
+            headers["X-Goog-FieldMask"] = mask
+        return headers
 
     async def get_current_conditions(self) -> dict[str, Any]:
         """Get current weather conditions."""
+        return (await self.fetch_current_conditions()).json()
+
+    async def fetch_current_conditions(self) -> ApiResponse:
+        """Get current weather conditions, without decoding them yet."""
         params = {
             "unitsSystem": self.units
         }
@@ -82,23 +279,81 @@ class GoogleMapsWeatherAPI:
         Args:
             days: Number of days to forecast (1-10, default: 10)
         """
-        params = {
-            "days": min(max(days, 1), 10)  # Limitar entre 1 y 10
-        }
+        return (await self.fetch_daily_forecast(days)).json()
+
+    async def fetch_daily_forecast(self, days: int = 10) -> ApiResponse:
+        """Get daily weather forecast, without decoding it yet."""
+        days = min(max(days, 1), 10)  # Limitar entre 1 y 10
+        # Sin pageSize la API devuelve solo 5 días por página
+        params = {"days": days, "pageSize": days}
         return await self._make_request(DAILY_FORECAST_ENDPOINT, params)
 
-    async def get_hourly_forecast(self, hours: int = 240) -> dict[str, Any]:
-        """Get hourly weather forecast.
+    async def get_hourly_forecast(
+        self, hours: int = 240, page_size: int = HOURLY_MAX_PAGE_SIZE
+    ) -> dict[str, Any]:
+        """Get hourly weather forecast, all pages merged.
         
         Args:
             hours: Number of hours to forecast (1-240, default: 240)
+            page_size: Hours per request (1-24, default: 24)
         """
-        params = {
-            "hours": min(max(hours, 1), 240)  # Limitar entre 1 y 240
+        return merge_hourly_pages(
+            [
+                page.json()
+                async for page in self.async_hourly_forecast_pages(hours, page_size)
+            ]
+        )
+
+    async def async_hourly_forecast_pages(
+        self,
+        hours: int = 240,
+        page_size: int = HOURLY_MAX_PAGE_SIZE,
+        known_pages: dict[str, str] | None = None,
+    ) -> AsyncIterator[ApiResponse]:
+        """Yield the pages of the hourly forecast as they arrive.
+
+        Each page is one request; the next one is only sent when the caller
+        asks for it, so the first hours can be used while the rest loads.
+        known_pages maps the fingerprints of pages already received to their
+        next page token (empty for the last page): the token of an identical
+        page is taken from there without decoding it.
+        """
+        params: dict[str, Any] = {
+            "hours": min(max(hours, 1), 240),  # Limitar entre 1 y 240
+            "pageSize": min(max(page_size, 1), HOURLY_MAX_PAGE_SIZE),
         }
-        return await self._make_request(HOURLY_FORECAST_ENDPOINT, params)
+        known_pages = known_pages or {}
+        while True:
+            page = await self._make_request(HOURLY_FORECAST_ENDPOINT, dict(params))
+            page_token = known_pages.get(page.fingerprint)
+            if page_token is None:
+                page_token = page.json().get("nextPageToken") or ""
+            page.next_page_token = page_token
+            yield page
+            if not page_token:
+                return
+            params["pageToken"] = page_token
+
+
+def _decompress(body: bytes, encoding: str) -> bytes:
+    """Return the body of a response decoded from its content encoding."""
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+def merge_hourly_pages(pages: list[dict[str, Any]]) -> dict[str, Any]:
+    """Merge hourly forecast pages into one payload.
 
-    async def close(self) -> None:
-        """Close the aiohttp session."""
-        if self._session and not self._session.closed:
-            await self._session.close()
+    Hours are keyed by their start time, so overlapping pages never repeat
+    an hour.
+    """
+    hours: dict[str, dict[str, Any]] = {}
+    for page in pages:
+        for hour in page.get("forecastHours", []):
+            hours[hour.get("interval", {}).get("startTime", "")] = hour
+    payload = {key: value for key, value in pages[0].items() if key != "nextPageToken"}
+    payload["forecastHours"] = [hours[start] for start in sorted(hours)]
+    return payload
@@ -0,0 +1,4 @@
+"""Offline benchmarks for Google Maps Weather.
+
+Run from the repository root with ``python -m benchmarks``; see README.
+"""
@@ -0,0 +1,98 @@
+"""Run the benchmarks and compare them with the stored baseline.
+
+Exits with status 1 when a result is worse than the baseline by more than
+the tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import sys
+
+from .suite import Result, async_run
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def main() -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed change against the baseline before it is a regression (default: 0.25)",
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="store these results as the baseline"
+    )
+    parser.add_argument("--recorded", type=Path, help="directory with recorded payloads")
+    args = parser.parse_args()
+
+    results = asyncio.run(async_run(args.recorded))
+
+    baseline: dict[str, dict[str, float]] = {}
+    if args.baseline.is_file():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = _report(results, baseline, args.tolerance)
+
+    if args.update_baseline:
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    name: {"value": round(result.value, 3), "unit": result.unit}
+                    for name, result in results.items()
+                },
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def _report(
+    results: dict[str, Result], baseline: dict[str, dict[str, float]], tolerance: float
+) -> list[str]:
+    """Print the results against the baseline and return the regressions.
+
+    Benchmarks missing from the baseline and baseline entries no longer in
+    the suite are listed too, as they are not compared.
+    """
+    regressions = []
+    missing = []
+    print(f"{'benchmark':<32} {'value':>12} {'unit':<6} {'baseline':>12} {'change':>8}")
+    for name, result in results.items():
+        line = f"{name:<32} {result.value:>12.2f} {result.unit:<6}"
+        if (stored := baseline.get(name)) is None or not stored["value"]:
+            missing.append(name)
+            print(f"{line} {'-':>12} {'new':>8}")
+            continue
+        change = result.value / stored["value"] - 1
+        # Para el rendimiento (req/s) lo peor es bajar; para el resto, subir
+        worse = -change if result.higher_is_better else change
+        status = ""
+        if worse > tolerance:
+            regressions.append(name)
+            status = "  REGRESSION"
+        print(f"{line} {stored['value']:>12.2f} {change:>+8.1%}{status}")
+    # Una baseline de otra versión de la suite no compara todo en silencio
+    if baseline and missing:
+        print(f"Not in the baseline, not compared: {', '.join(missing)}")
+    if extra := sorted(set(baseline) - set(results)):
+        print(f"In the baseline but not in the suite: {', '.join(extra)}")
+    if baseline and (missing or extra):
+        print("Run with --update-baseline on the reference checkout to refresh it")
+    return regressions
+
+
+if __name__ == "__main__":
+    sys.exit(main())
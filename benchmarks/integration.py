@@ -0,0 +1,28 @@
+"""Import the integration from the repository root.
+
+The repository root is the integration package itself, so it is loaded
+under PACKAGE for its relative imports to resolve.
+"""
+from __future__ import annotations
+
+import importlib
+import importlib.util
+from pathlib import Path
+import sys
+from types import ModuleType
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "google_maps_weather"
+
+
+def load(module: str) -> ModuleType:
+    """Return a module of the integration, e.g. load("api")."""
+    if PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+        )
+        assert spec is not None and spec.loader is not None
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE] = package
+        spec.loader.exec_module(package)
+    return importlib.import_module(f"{PACKAGE}.{module}")
@@ -0,0 +1,149 @@
+"""Payloads served by the stub Weather API.
+
+Synthetic payloads follow the shape of the real responses. A JSON file
+named after an endpoint (current.json, daily.json, hourly.json) in a
+directory of recorded responses replaces the synthetic payload of that
+endpoint.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import json
+from pathlib import Path
+from typing import Any
+
+# Inicio fijo: los resultados no dependen del día en que se ejecutan
+START = datetime(2025, 1, 1, 6, tzinfo=timezone.utc)
+
+_CONDITIONS = ("CLEAR", "PARTLY_CLOUDY", "CLOUDY", "LIGHT_RAIN", "RAIN", "THUNDERSTORM")
+
+
+def load_recorded(endpoint: str, directory: Path) -> dict[str, Any] | None:
+    """Return the recorded payload of an endpoint, if there is one."""
+    path = directory / f"{endpoint}.json"
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def current_conditions(padding: int = 0) -> dict[str, Any]:
+    """Return a current conditions payload.
+
+    padding adds that many bytes of unused data, as a pathological response.
+    """
+    payload: dict[str, Any] = {
+        "currentTime": _timestamp(START),
+        "timeZone": {"id": "Europe/Madrid"},
+        "isDaytime": True,
+        "weatherCondition": {
+            "type": "PARTLY_CLOUDY",
+            "description": {"text": "Partly cloudy", "languageCode": "en"},
+        },
+        "temperature": {"degrees": 18.4, "unit": "CELSIUS"},
+        "feelsLikeTemperature": {"degrees": 17.9, "unit": "CELSIUS"},
+        "dewPoint": {"degrees": 9.1, "unit": "CELSIUS"},
+        "heatIndex": {"degrees": 18.4, "unit": "CELSIUS"},
+        "windChill": {"degrees": 17.9, "unit": "CELSIUS"},
+        "relativeHumidity": 55,
+        "uvIndex": 3,
+        "precipitation": {
+            "probability": {"percent": 10, "type": "RAIN"},
+            "qpf": {"quantity": 0.2, "unit": "MILLIMETERS"},
+        },
+        "thunderstormProbability": 5,
+        "airPressure": {"meanSeaLevelMillibars": 1015.3},
+        "wind": {
+            "direction": {"degrees": 270, "cardinal": "WEST"},
+            "speed": {"value": 12, "unit": "KILOMETERS_PER_HOUR"},
+            "gust": {"value": 25, "unit": "KILOMETERS_PER_HOUR"},
+        },
+        "visibility": {"distance": 16, "unit": "KILOMETERS"},
+        "cloudCover": 40,
+    }
+    if padding:
+        payload["padding"] = "x" * padding
+    return payload
+
+
+def daily_forecast(days: int = 10, padding: int = 0) -> dict[str, Any]:
+    """Return a daily forecast payload; padding is added to every day."""
+    forecast_days = []
+    for index in range(days):
+        start = START + timedelta(days=index)
+        precipitation = {
+            "probability": {"percent": (index * 17) % 100, "type": "RAIN"},
+            "qpf": {"quantity": 0.5 * (index % 5), "unit": "MILLIMETERS"},
+        }
+        day: dict[str, Any] = {
+            "interval": {
+                "startTime": _timestamp(start),
+                "endTime": _timestamp(start + timedelta(days=1)),
+            },
+            "displayDate": {"year": start.year, "month": start.month, "day": start.day},
+            "daytimeForecast": {
+                "weatherCondition": {"type": _CONDITIONS[index % len(_CONDITIONS)]},
+                "relativeHumidity": 50 + index,
+                "precipitation": precipitation,
+                "wind": {"speed": {"value": 10 + index}, "gust": {"value": 20 + index}},
+                "cloudCover": (index * 9) % 100,
+            },
+            "nighttimeForecast": {
+                "weatherCondition": {"type": "CLEAR"},
+                "relativeHumidity": 70,
+                "precipitation": precipitation,
+            },
+            "maxTemperature": {"degrees": 20.0 + index % 4, "unit": "CELSIUS"},
+            "minTemperature": {"degrees": 9.0 + index % 3, "unit": "CELSIUS"},
+            "feelsLikeMaxTemperature": {"degrees": 19.5 + index % 4, "unit": "CELSIUS"},
+            "feelsLikeMinTemperature": {"degrees": 8.0 + index % 3, "unit": "CELSIUS"},
+        }
+        if padding:
+            day["padding"] = "x" * padding
+        forecast_days.append(day)
+    return {"forecastDays": forecast_days, "timeZone": {"id": "Europe/Madrid"}}
+
+
+def hourly_forecast(hours: int = 240, padding: int = 0) -> dict[str, Any]:
+    """Return an hourly forecast payload; padding is added to every hour."""
+    forecast_hours = []
+    for index in range(hours):
+        start = START + timedelta(hours=index)
+        hour: dict[str, Any] = {
+            "interval": {
+                "startTime": _timestamp(start),
+                "endTime": _timestamp(start + timedelta(hours=1)),
+            },
+            "displayDateTime": {
+                "year": start.year,
+                "month": start.month,
+                "day": start.day,
+                "hours": start.hour,
+            },
+            "isDaytime": 7 <= start.hour < 19,
+            "weatherCondition": {"type": _CONDITIONS[index % len(_CONDITIONS)]},
+            "temperature": {"degrees": 10.0 + (index % 24) * 0.5, "unit": "CELSIUS"},
+            "feelsLikeTemperature": {"degrees": 9.5 + (index % 24) * 0.5, "unit": "CELSIUS"},
+            "precipitation": {
+                "probability": {"percent": (index * 7) % 100, "type": "RAIN"},
+                "qpf": {"quantity": 0.1 * (index % 4), "unit": "MILLIMETERS"},
+            },
+            "wind": {
+                "direction": {"degrees": (index * 15) % 360, "cardinal": "EAST"},
+                "speed": {"value": 5 + index % 10, "unit": "KILOMETERS_PER_HOUR"},
+                "gust": {"value": 10 + index % 15, "unit": "KILOMETERS_PER_HOUR"},
+            },
+            "relativeHumidity": 60,
+            "uvIndex": 2,
+            "thunderstormProbability": index % 20,
+            "airPressure": {"meanSeaLevelMillibars": 1012},
+            "cloudCover": 30,
+        }
+        if padding:
+            hour["padding"] = "x" * padding
+        forecast_hours.append(hour)
+    return {"forecastHours": forecast_hours, "timeZone": {"id": "Europe/Madrid"}}
+
+
+def _timestamp(value: datetime) -> str:
+    """Return a timestamp formatted like the API does."""
+    return value.isoformat().replace("+00:00", "Z")
@@ -0,0 +1,236 @@
+"""Local stand-in for the Google Maps Weather API.
+
+Serves currentConditions:lookup, forecast/days:lookup and
+forecast/hours:lookup from synthetic or recorded payloads, with optional
+latency, errors and oversized responses. Hourly forecasts are paged with
+pageSize and pageToken like the real API; field masks are ignored.
+
+Run on its own with ``python -m benchmarks.stub_server --port 8080``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+import gzip
+import json
+from pathlib import Path
+import random
+from typing import Any
+
+import aiohttp
+from aiohttp import hdrs, web
+
+from . import payloads
+
+GOOGLE_API_BASE_URL = "https://weather.googleapis.com/v1"
+
+
+@dataclass
+class Scenario:
+    """How the stub answers.
+
+    A fraction error_rate of the requests is answered with error_status
+    (and a Retry-After header when retry_after is set). padding adds that
+    many unused bytes to the response and to every day and hour of the
+    forecasts.
+    """
+
+    latency: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: int | None = None
+    days: int = 10
+    hours: int = 240
+    padding: int = 0
+    recorded: Path | None = None
+    seed: int = 0
+
+
+class StubWeatherAPI:
+    """aiohttp server answering like the Weather API."""
+
+    def __init__(self, scenario: Scenario | None = None) -> None:
+        """Initialize the server."""
+        self.scenario = scenario or Scenario()
+        # Peticiones recibidas por endpoint y por estado devuelto
+        self.requests: Counter[str] = Counter()
+        self.statuses: Counter[int] = Counter()
+        self._random = random.Random(self.scenario.seed)
+        self._payloads: dict[str, dict[str, Any]] = {}
+        # Cuerpos ya serializados (y comprimidos) por petición
+        self._bodies: dict[tuple[str, int, int, bool], bytes] = {}
+        self._runner: web.AppRunner | None = None
+        self.app = web.Application()
+        self.app.router.add_get("/v1/currentConditions:lookup", self._handle_current)
+        self.app.router.add_get("/v1/forecast/days:lookup", self._handle_daily)
+        self.app.router.add_get("/v1/forecast/hours:lookup", self._handle_hourly)
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL, which replaces the API's."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        return f"http://{host}:{bound_port}/v1"
+
+    async def async_stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_current(self, request: web.Request) -> web.StreamResponse:
+        """Answer a current conditions request."""
+        return await self._respond(request, "current")
+
+    async def _handle_daily(self, request: web.Request) -> web.StreamResponse:
+        """Answer a daily forecast request."""
+        return await self._respond(request, "daily")
+
+    async def _handle_hourly(self, request: web.Request) -> web.StreamResponse:
+        """Answer an hourly forecast request, one page at a time."""
+        return await self._respond(request, "hourly")
+
+    async def _respond(self, request: web.Request, endpoint: str) -> web.StreamResponse:
+        """Answer a request after the scenario's latency, or with an error."""
+        scenario = self.scenario
+        self.requests[endpoint] += 1
+        if scenario.latency:
+            await asyncio.sleep(scenario.latency)
+        if "key" not in request.query:
+            return self._error(403, "The request is missing a valid API key.")
+        if scenario.error_rate and self._random.random() < scenario.error_rate:
+            return self._error(scenario.error_status, "Injected error.")
+
+        page_size = page_start = 0
+        if endpoint == "hourly":
+            try:
+                page_size = min(max(int(request.query.get("pageSize", 24)), 1), 24)
+                page_start = int(request.query.get("pageToken", 0))
+            except ValueError:
+                return self._error(400, "Invalid page.")
+        compress = "gzip" in request.headers.get(hdrs.ACCEPT_ENCODING, "")
+        body = self._body(endpoint, page_size, page_start, compress)
+        self.statuses[200] += 1
+        response = web.Response(body=body, content_type="application/json")
+        if compress:
+            response.headers[hdrs.CONTENT_ENCODING] = "gzip"
+        return response
+
+    def _error(self, status: int, message: str) -> web.Response:
+        """Return an error response shaped like the API's."""
+        self.statuses[status] += 1
+        headers = {}
+        if status == 429 and self.scenario.retry_after is not None:
+            headers[hdrs.RETRY_AFTER] = str(self.scenario.retry_after)
+        return web.json_response(
+            {"error": {"code": status, "message": message}},
+            status=status,
+            headers=headers,
+        )
+
+    def _body(self, endpoint: str, page_size: int, page_start: int, compress: bool) -> bytes:
+        """Return the serialized response, built once per distinct request."""
+        key = (endpoint, page_size, page_start, compress)
+        if (body := self._bodies.get(key)) is not None:
+            return body
+        payload = self._payload(endpoint)
+        if endpoint == "hourly":
+            hours = payload.get("forecastHours", [])
+            payload = {**payload, "forecastHours": hours[page_start:page_start + page_size]}
+            if page_start + page_size < len(hours):
+                payload["nextPageToken"] = str(page_start + page_size)
+        body = json.dumps(payload).encode()
+        if compress:
+            body = gzip.compress(body)
+        self._bodies[key] = body
+        return body
+
+    def _payload(self, endpoint: str) -> dict[str, Any]:
+        """Return the full payload of an endpoint."""
+        if (payload := self._payloads.get(endpoint)) is not None:
+            return payload
+        scenario = self.scenario
+        payload = (
+            payloads.load_recorded(endpoint, scenario.recorded)
+            if scenario.recorded is not None
+            else None
+        )
+        if payload is None:
+            if endpoint == "current":
+                payload = payloads.current_conditions(scenario.padding)
+            elif endpoint == "daily":
+                payload = payloads.daily_forecast(scenario.days, scenario.padding)
+            else:
+                payload = payloads.hourly_forecast(scenario.hours, scenario.padding)
+        self._payloads[endpoint] = payload
+        return payload
+
+
+class StubSession:
+    """Client session sending the requests for the API to the stub.
+
+    Wraps an aiohttp session and only rewrites the base URL, so the client
+    under test runs unchanged.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        base_url: str,
+        api_base_url: str = GOOGLE_API_BASE_URL,
+    ) -> None:
+        """Initialize the session."""
+        self._session = session
+        self._base_url = base_url
+        self._api_base_url = api_base_url
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        """Send a GET request to the stub."""
+        return self._session.get(url.replace(self._api_base_url, self._base_url), **kwargs)
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Serve until interrupted."""
+    server = StubWeatherAPI(
+        Scenario(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            retry_after=args.retry_after,
+            hours=args.hours,
+            padding=args.padding,
+            recorded=args.recorded,
+        )
+    )
+    base_url = await server.async_start(args.host, args.port)
+    print(f"Stub Weather API at {base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.async_stop()
+
+
+def main() -> None:
+    """Run the stub server from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int)
+    parser.add_argument("--hours", type=int, default=240)
+    parser.add_argument("--padding", type=int, default=0, help="extra bytes per entry")
+    parser.add_argument("--recorded", type=Path, help="directory with recorded payloads")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Benchmark cases.
+
+Every case returns its results as {name: Result}. Timings are the best of
+several runs, which is the least noisy figure on a shared machine.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+import gc
+import json
+from pathlib import Path
+import tempfile
+from time import perf_counter
+import timeit
+import tracemalloc
+from typing import Any
+
+import aiohttp
+
+from . import payloads
+from .integration import load
+from .stub_server import Scenario, StubSession, StubWeatherAPI
+
+HOURLY_HORIZONS = (24, 48, 120, 240)
+REQUESTS = 400
+CONCURRENCY = 8
+LOCATIONS = 10
+REPEAT = 5
+
+
+@dataclass
+class Result:
+    """A measured value and which direction is better."""
+
+    value: float
+    unit: str
+    higher_is_better: bool = False
+
+
+async def async_run(recorded: Path | None = None) -> dict[str, Result]:
+    """Run every case."""
+    results: dict[str, Result] = {}
+    results.update(await _async_request_throughput(recorded))
+    results.update(_forecast_build(recorded))
+    results.update(_sensor_native_value(recorded))
+    results.update(await _async_memory_per_location(recorded))
+    return results
+
+
+async def _async_request_throughput(recorded: Path | None) -> dict[str, Result]:
+    """Requests per second through _make_request against the stub server."""
+    api_module = load("api")
+    const = load("const")
+    metrics_module = load("metrics")
+
+    results: dict[str, Result] = {}
+    for name, scenario, fetch in (
+        ("make_request_current", Scenario(recorded=recorded), "get_current_conditions"),
+        ("make_request_daily", Scenario(recorded=recorded), "get_daily_forecast"),
+        # Una página de 24 horas; el resto de páginas son peticiones iguales
+        (
+            "make_request_hourly_page",
+            Scenario(hours=24, recorded=recorded),
+            "get_hourly_forecast",
+        ),
+        (
+            "make_request_current_padded",
+            Scenario(padding=256 * 1024),
+            "get_current_conditions",
+        ),
+    ):
+        server = StubWeatherAPI(scenario)
+        base_url = await server.async_start()
+        # Igual que el transporte compartido: sin descompresión automática
+        async with aiohttp.ClientSession(auto_decompress=False) as session:
+            api = api_module.GoogleMapsWeatherAPI(
+                StubSession(session, base_url, const.API_BASE_URL),
+                "benchmark",
+                40.4168,
+                -3.7038,
+                metrics=metrics_module.PerformanceMetrics(),
+                retries=0,
+            )
+            request = getattr(api, fetch)
+            # Calentamiento: conexiones abiertas y cuerpos ya serializados
+            await asyncio.gather(*(request() for _ in range(CONCURRENCY)))
+            best = 0.0
+            for _ in range(REPEAT):
+                start = perf_counter()
+                for _ in range(REQUESTS // CONCURRENCY):
+                    await asyncio.gather(*(request() for _ in range(CONCURRENCY)))
+                best = max(best, REQUESTS / (perf_counter() - start))
+        await server.async_stop()
+        results[name] = Result(best, "req/s", higher_is_better=True)
+    return results
+
+
+def _forecast_build(recorded: Path | None) -> dict[str, Result]:
+    """Time to decode the forecasts, build what the weather entity returns and query them."""
+    api = load("api")
+    forecast = load("forecast")
+    models = load("models")
+    query = load("query")
+    dt_util = load("coordinator").dt_util
+    time_zone = dt_util.get_time_zone("Europe/Madrid")
+    today = payloads.START.date()
+    now = payloads.START
+
+    daily = _payload("daily", recorded) or payloads.daily_forecast()
+    results = {
+        "build_daily_forecast": Result(
+            _best(
+                lambda: forecast.build_daily_forecast(
+                    models.decode_daily(daily), time_zone, today
+                )
+            )
+            * 1e6,
+            "µs",
+        )
+    }
+    hourly_payload = _payload("hourly", recorded) or payloads.hourly_forecast()
+    for hours in HOURLY_HORIZONS:
+        hourly = {
+            **hourly_payload,
+            "forecastHours": hourly_payload["forecastHours"][:hours],
+        }
+        results[f"decode_hourly_{hours}h"] = Result(
+            _best(lambda: models.decode_hourly(hourly)) * 1e6, "µs"
+        )
+        # Lo que cuesta reconocer una respuesta idéntica sin decodificarla
+        body = json.dumps(hourly).encode()
+        results[f"fingerprint_hourly_{hours}h"] = Result(
+            _best(lambda: api.fingerprint(body)) * 1e6, "µs"
+        )
+        snapshot = forecast.ForecastSnapshot(today, (), models.decode_hourly(hourly))
+        results[f"hourly_forecast_{hours}h"] = Result(
+            _best(lambda: snapshot.hourly_forecast(now)) * 1e6, "µs"
+        )
+        results[f"daily_from_hourly_{hours}h"] = Result(
+            _best(lambda: models.daily_from_hourly(snapshot.hourly, time_zone)) * 1e6,
+            "µs",
+        )
+        # Ventana de 4 horas dentro de un día, como una automatización
+        results[f"query_forecast_{hours}h"] = Result(
+            _best(
+                lambda: query.query_forecast(
+                    snapshot.hourly,
+                    3600,
+                    time_zone,
+                    now + timedelta(hours=14),
+                    now + timedelta(hours=18),
+                    "precipitation_probability",
+                    above=50,
+                )
+            )
+            * 1e6,
+            "µs",
+        )
+    return results
+
+
+def _sensor_native_value(recorded: Path | None) -> dict[str, Result]:
+    """Time to read the state of one current conditions sensor."""
+    coordinator_module = load("coordinator")
+    sensor = load("sensor")
+
+    class _Coordinator:
+        """What a sensor reads from its coordinator."""
+
+        unique_prefix = "benchmark"
+        location_name = "Benchmark"
+        current = coordinator_module.flatten_payload(
+            _payload("current", recorded) or payloads.current_conditions()
+        )
+
+    coordinator = _Coordinator()
+    entities = [
+        sensor.GoogleMapsWeatherSensor(coordinator, description)
+        for description in sensor.SENSOR_DESCRIPTIONS
+    ]
+
+    def read_all() -> None:
+        for entity in entities:
+            entity.native_value
+
+    return {
+        "sensor_native_value": Result(_best(read_all) / len(entities) * 1e9, "ns")
+    }
+
+
+async def _async_memory_per_location(recorded: Path | None) -> dict[str, Result]:
+    """Memory held by the coordinator of one location with all its data."""
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+    from homeassistant.util.json import json_loads
+
+    api_module = load("api")
+    cache_module = load("cache")
+    const = load("const")
+    coordinator_module = load("coordinator")
+    metrics_module = load("metrics")
+    models = load("models")
+
+    results: dict[str, Result] = {}
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.config.time_zone = "Europe/Madrid"
+        for hours in (48, 240):
+            entry = ConfigEntry(
+                version=1,
+                minor_version=1,
+                domain=const.DOMAIN,
+                title="Benchmark",
+                data={const.CONF_API_KEY: "benchmark", const.CONF_HOURLY_FORECAST_HOURS: hours},
+                source="user",
+            )
+            bodies = {
+                const.ENDPOINT_CURRENT: json.dumps(
+                    _payload("current", recorded) or payloads.current_conditions()
+                ),
+                const.ENDPOINT_DAILY: json.dumps(
+                    _payload("daily", recorded) or payloads.daily_forecast()
+                ),
+                const.ENDPOINT_HOURLY: json.dumps(payloads.hourly_forecast(hours)),
+            }
+            cache = cache_module.ResponseCache(hass, entry.entry_id)
+            metrics = metrics_module.PerformanceMetrics()
+
+            gc.collect()
+            tracemalloc.start()
+            start = tracemalloc.get_traced_memory()[0]
+            coordinators = []
+            for index in range(LOCATIONS):
+                location = {
+                    const.CONF_LOCATION_ID: f"location{index}",
+                    const.CONF_NAME: f"Location {index}",
+                }
+                api = api_module.GoogleMapsWeatherAPI(
+                    None, "benchmark", 40.0 + index, -3.0, metrics=metrics
+                )
+                coordinator = coordinator_module.GoogleMapsWeatherCoordinator(
+                    hass, entry, location, api, cache, metrics
+                )
+                # Cada ubicación decodifica sus propias respuestas, como al
+                # recibirlas; de los pronósticos solo quedan las columnas
+                data = {
+                    const.ENDPOINT_CURRENT: json_loads(bodies[const.ENDPOINT_CURRENT]),
+                    const.ENDPOINT_DAILY: models.decode_daily(
+                        json_loads(bodies[const.ENDPOINT_DAILY])
+                    ),
+                    const.ENDPOINT_HOURLY: models.decode_hourly(
+                        json_loads(bodies[const.ENDPOINT_HOURLY])
+                    ),
+                }
+                coordinator._process_data(data, set())
+                coordinator.data = data
+                coordinators.append(coordinator)
+            gc.collect()
+            used = tracemalloc.get_traced_memory()[0] - start
+            tracemalloc.stop()
+            results[f"memory_per_location_{hours}h"] = Result(
+                used / LOCATIONS / 1024, "KiB"
+            )
+            del coordinators
+        await hass.async_stop(force=True)
+    return results
+
+
+def _payload(endpoint: str, recorded: Path | None) -> dict[str, Any] | None:
+    """Return the recorded payload of an endpoint, if any."""
+    if recorded is None:
+        return None
+    return payloads.load_recorded(endpoint, recorded)
+
+
+def _best(function: Callable[[], Any]) -> float:
+    """Return the best time of one call, in seconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(REPEAT, number)) / number
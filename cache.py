@@ -0,0 +1,162 @@
+"""Persistent response cache for Google Maps Weather."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CACHE_SAVE_DELAY,
+    CACHE_STORAGE_VERSION,
+    DOMAIN,
+    ENDPOINT_DAILY,
+    ENDPOINT_HOURLY,
+)
+from .models import ForecastColumns, decode_daily, decode_hourly
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Last good payload of every endpoint of every location of an entry.
+
+    Each record keeps the request key it was fetched with (coordinates and
+    parameters) so a changed location or option never serves stale data,
+    and the fingerprint of the response it was decoded from, if known.
+    Forecasts are kept as their decoded columns, which are also what is
+    written to disk.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, CACHE_STORAGE_VERSION, storage_key(entry_id), private=True
+        )
+        self._records: dict[str, dict[str, dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def async_load(self, location_ids: Iterable[str]) -> None:
+        """Load the cache from disk, dropping locations that no longer exist."""
+        stored = await self._store.async_load() or {}
+        wanted = set(location_ids)
+        self._records = {
+            location_id: {
+                endpoint: {**record, "payload": _load_payload(endpoint, record["payload"])}
+                for endpoint, record in records.items()
+            }
+            for location_id, records in stored.get("locations", {}).items()
+            if location_id in wanted
+        }
+        _LOGGER.debug(
+            "Loaded cached responses for %s of %s locations",
+            len(self._records),
+            len(wanted),
+        )
+
+    def get_fresh(
+        self, location_id: str, endpoint: str, key: str, ttl: timedelta
+    ) -> Any:
+        """Return the cached payload if it matches the key and is younger than ttl."""
+        record = self._records.get(location_id, {}).get(endpoint)
+        if (
+            record is None
+            or record["key"] != key
+            or dt_util.utcnow().timestamp() - record["fetched_at"] >= ttl.total_seconds()
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record["payload"]
+
+    def get(self, location_id: str, endpoint: str, key: str) -> Any:
+        """Return the cached payload if it matches the key, whatever its age."""
+        record = self._records.get(location_id, {}).get(endpoint)
+        if record is None or record["key"] != key:
+            return None
+        return record["payload"]
+
+    def fingerprint(self, location_id: str, endpoint: str, key: str) -> Any:
+        """Return the fingerprint of the response behind the cached payload."""
+        record = self._records.get(location_id, {}).get(endpoint)
+        if record is None or record["key"] != key:
+            return None
+        return record.get("fingerprint")
+
+    def fetched_at(self, location_id: str, endpoint: str) -> datetime | None:
+        """Return when the cached payload of an endpoint was fetched."""
+        record = self._records.get(location_id, {}).get(endpoint)
+        if record is None:
+            return None
+        return dt_util.utc_from_timestamp(record["fetched_at"])
+
+    @callback
+    def async_set(
+        self,
+        location_id: str,
+        endpoint: str,
+        key: str,
+        payload: Any,
+        fetched_at: float | None = None,
+        fingerprint: Any = None,
+    ) -> None:
+        """Store a payload and schedule a write to disk.
+
+        fetched_at is the UTC timestamp of the fetch, now when not given.
+        """
+        self._records.setdefault(location_id, {})[endpoint] = {
+            "key": key,
+            "fetched_at": dt_util.utcnow().timestamp() if fetched_at is None else fetched_at,
+            "fingerprint": fingerprint,
+            "payload": payload,
+        }
+        self._store.async_delay_save(self._data_to_save, CACHE_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write pending changes to disk now."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {
+            "locations": {
+                location_id: {
+                    endpoint: {
+                        **record,
+                        "payload": (
+                            payload.as_dict()
+                            if isinstance(payload := record["payload"], ForecastColumns)
+                            else payload
+                        ),
+                    }
+                    for endpoint, record in records.items()
+                }
+                for location_id, records in self._records.items()
+            }
+        }
+
+
+def _load_payload(endpoint: str, payload: dict[str, Any]) -> Any:
+    """Return a stored payload as the coordinator uses it."""
+    if endpoint not in (ENDPOINT_DAILY, ENDPOINT_HOURLY):
+        return payload
+    if "start" in payload:
+        return ForecastColumns.from_dict(payload)
+    # Guardado por una versión anterior: la respuesta entera de la API
+    return (decode_daily if endpoint == ENDPOINT_DAILY else decode_hourly)(payload)
+
+
+def storage_key(entry_id: str) -> str:
+    """Return the storage key of the cache of an entry."""
+    return f"{DOMAIN}.{entry_id}.responses"
+
+
+async def async_remove_cache(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the cache file of a removed entry."""
+    await Store(hass, CACHE_STORAGE_VERSION, storage_key(entry_id)).async_remove()
@@ -3,27 +3,53 @@ from __future__ import annotations
 
 import logging
 from typing import Any
+from uuid import uuid4
 
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 
 from .api import GoogleMapsWeatherAPI
+from .coordinator import get_adaptive_budget, get_endpoint_intervals, get_locations
+from .transport import async_get_transport
+from .usage import async_get_usage
 from .const import (
+    CONF_ADAPTIVE_BUDGET,
+    CONF_ADAPTIVE_POLLING,
     CONF_API_KEY,
+    CONF_DAILY_FROM_HOURLY,
+    CONF_LOCATION_ID,
+    CONF_LOCATIONS,
+    CONF_NAME,
     CONF_UNITS,
-    CONF_UPDATE_INTERVAL,
+    CONF_CURRENT_INTERVAL,
+    CONF_DAILY_INTERVAL,
+    CONF_HOURLY_INTERVAL,
     CONF_HOURLY_FORECAST_HOURS,
+    CONF_HOURLY_PAGE_SIZE,
+    CONF_MONTHLY_BUDGET,
+    CONF_GRID_RESOLUTION,
+    CURRENT_INTERVALS,
+    DAILY_FROM_HOURLY_MIN_HOURS,
+    DAILY_INTERVALS,
     DEFAULT_NAME,
     DEFAULT_UNITS,
-    DEFAULT_UPDATE_INTERVAL,
     DEFAULT_HOURLY_FORECAST_HOURS,
+    DEFAULT_HOURLY_PAGE_SIZE,
+    DEFAULT_GRID_RESOLUTION,
     DOMAIN,
-    UPDATE_INTERVALS,
+    ENDPOINT_CURRENT,
+    ENDPOINT_DAILY,
+    ENDPOINT_HOURLY,
+    ENDPOINT_INTERVAL_DEFAULTS,
+    GRID_RESOLUTION_OPTIONS,
+    HOURLY_INTERVALS,
+    HOURLY_MAX_PAGE_SIZE,
+    LOCATION_PRIMARY_ID,
     HOURLY_FORECAST_OPTIONS,
 )
 
@@ -36,10 +62,14 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
     api = GoogleMapsWeatherAPI(
+        async_get_transport(hass).session,
         data[CONF_API_KEY],
         data[CONF_LATITUDE],
         data[CONF_LONGITUDE],
-        data.get(CONF_UNITS, DEFAULT_UNITS)
+        data.get(CONF_UNITS, DEFAULT_UNITS),
+        usage=await async_get_usage(hass),
+        # Sin reintentos: el usuario espera la respuesta del formulario
+        retries=0,
     )
 
     try:
@@ -48,8 +78,6 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     except Exception as err:
         _LOGGER.error("Error validating API: %s", err)
         raise
-    finally:
-        await api.close()
 
     # Retornar información para crear la entrada
     return {"title": DEFAULT_NAME}
@@ -78,8 +106,23 @@ class GoogleMapsWeatherConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     f"{user_input[CONF_LATITUDE]}_{user_input[CONF_LONGITUDE]}"
                 )
                 self._abort_if_unique_id_configured()
+                if _location_configured(
+                    self.hass, user_input[CONF_LATITUDE], user_input[CONF_LONGITUDE]
+                ):
+                    return self.async_abort(reason="already_configured")
 
-                return self.async_create_entry(title=info["title"], data=user_input)
+                # La primera ubicación se guarda dentro de la lista de ubicaciones;
+                # se pueden añadir más desde las opciones de la integración
+                data = dict(user_input)
+                data[CONF_LOCATIONS] = [
+                    {
+                        CONF_LOCATION_ID: LOCATION_PRIMARY_ID,
+                        CONF_NAME: data.pop(CONF_NAME, DEFAULT_NAME),
+                        CONF_LATITUDE: data.pop(CONF_LATITUDE),
+                        CONF_LONGITUDE: data.pop(CONF_LONGITUDE),
+                    }
+                ]
+                return self.async_create_entry(title=info["title"], data=data)
 
         # Valores por defecto usando la ubicación de Home Assistant
         default_latitude = self.hass.config.latitude
@@ -88,14 +131,13 @@ class GoogleMapsWeatherConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         data_schema = vol.Schema(
             {
                 vol.Required(CONF_API_KEY): str,
+                vol.Optional(CONF_NAME, default=DEFAULT_NAME): str,
                 vol.Required(CONF_LATITUDE, default=default_latitude): cv.latitude,
                 vol.Required(CONF_LONGITUDE, default=default_longitude): cv.longitude,
                 vol.Optional(CONF_UNITS, default=DEFAULT_UNITS): vol.In(
                     ["METRIC", "IMPERIAL"]
                 ),
-                vol.Optional(CONF_UPDATE_INTERVAL, default=DEFAULT_UPDATE_INTERVAL): vol.In(
-                    list(UPDATE_INTERVALS.keys())
-                ),
+                **_intervals_schema(ENDPOINT_INTERVAL_DEFAULTS),
                 vol.Optional(CONF_HOURLY_FORECAST_HOURS, default=DEFAULT_HOURLY_FORECAST_HOURS): vol.In(
                     list(HOURLY_FORECAST_OPTIONS.keys())
                 ),
@@ -107,11 +149,199 @@ class GoogleMapsWeatherConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=data_schema,
             errors=errors,
             description_placeholders={
-                "update_intervals": "\n".join(
-                    [f"• {interval} min: {desc}" for interval, desc in UPDATE_INTERVALS.items()]
-                ),
                 "hourly_forecast_options": "\n".join(
                     [f"• {hours}h: {desc}" for hours, desc in HOURLY_FORECAST_OPTIONS.items()]
                 )
             },
         )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> GoogleMapsWeatherOptionsFlow:
+        """Get the options flow for this handler."""
+        return GoogleMapsWeatherOptionsFlow(config_entry)
+
+
+class GoogleMapsWeatherOptionsFlow(config_entries.OptionsFlow):
+    """Manage the locations of a Google Maps Weather entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Show the location management menu."""
+        menu_options = ["add_location", "update_intervals"]
+        if len(get_locations(self._entry)) > 1:
+            menu_options.append("remove_location")
+        return self.async_show_menu(step_id="init", menu_options=menu_options)
+
+    async def async_step_add_location(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Add a location to the entry."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            if _location_configured(
+                self.hass, user_input[CONF_LATITUDE], user_input[CONF_LONGITUDE]
+            ):
+                errors["base"] = "already_configured"
+            else:
+                locations = get_locations(self._entry)
+                locations.append(
+                    {
+                        CONF_LOCATION_ID: uuid4().hex[:8],
+                        CONF_NAME: user_input[CONF_NAME],
+                        CONF_LATITUDE: user_input[CONF_LATITUDE],
+                        CONF_LONGITUDE: user_input[CONF_LONGITUDE],
+                    }
+                )
+                return self._async_save_locations(locations)
+
+        data_schema = vol.Schema(
+            {
+                vol.Required(CONF_NAME): str,
+                vol.Required(CONF_LATITUDE): cv.latitude,
+                vol.Required(CONF_LONGITUDE): cv.longitude,
+            }
+        )
+        return self.async_show_form(
+            step_id="add_location", data_schema=data_schema, errors=errors
+        )
+
+    async def async_step_remove_location(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Remove a location from the entry."""
+        locations = get_locations(self._entry)
+
+        if user_input is not None:
+            return self._async_save_locations(
+                [
+                    location
+                    for location in locations
+                    if location[CONF_LOCATION_ID] != user_input[CONF_LOCATION_ID]
+                ]
+            )
+
+        data_schema = vol.Schema(
+            {
+                vol.Required(CONF_LOCATION_ID): vol.In(
+                    {
+                        location[CONF_LOCATION_ID]: location[CONF_NAME]
+                        for location in locations
+                    }
+                ),
+            }
+        )
+        return self.async_show_form(step_id="remove_location", data_schema=data_schema)
+
+    async def async_step_update_intervals(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Change the refresh intervals, the polling mode, the forecast horizon and sources and the grid."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            data = {**self._entry.data, **user_input}
+            # Sin límite (vacío o 0) no se guarda: solo se aplica si se fija
+            if not user_input.get(CONF_MONTHLY_BUDGET):
+                data.pop(CONF_MONTHLY_BUDGET, None)
+            # El pronóstico diario calculado solo cubre los días del horario
+            if data.get(CONF_DAILY_FROM_HOURLY) and data.get(
+                CONF_HOURLY_FORECAST_HOURS, DEFAULT_HOURLY_FORECAST_HOURS
+            ) < DAILY_FROM_HOURLY_MIN_HOURS:
+                errors[CONF_DAILY_FROM_HOURLY] = "daily_from_hourly_hours"
+            else:
+                return self._async_save_data(data)
+
+        data = self._entry.data
+        data_schema = vol.Schema(
+            {
+                **_intervals_schema(get_endpoint_intervals(self._entry)),
+                vol.Optional(
+                    CONF_ADAPTIVE_POLLING,
+                    default=data.get(CONF_ADAPTIVE_POLLING, False),
+                ): bool,
+                vol.Optional(
+                    CONF_ADAPTIVE_BUDGET,
+                    default=get_adaptive_budget(self._entry),
+                ): vol.All(vol.Coerce(int), vol.Range(min=30)),
+                vol.Optional(
+                    CONF_MONTHLY_BUDGET,
+                    description={"suggested_value": data.get(CONF_MONTHLY_BUDGET)},
+                ): vol.All(vol.Coerce(int), vol.Any(0, vol.Range(min=30))),
+                vol.Optional(
+                    CONF_HOURLY_FORECAST_HOURS,
+                    default=data.get(
+                        CONF_HOURLY_FORECAST_HOURS, DEFAULT_HOURLY_FORECAST_HOURS
+                    ),
+                ): vol.In(list(HOURLY_FORECAST_OPTIONS.keys())),
+                vol.Optional(
+                    CONF_HOURLY_PAGE_SIZE,
+                    default=data.get(CONF_HOURLY_PAGE_SIZE, DEFAULT_HOURLY_PAGE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=HOURLY_MAX_PAGE_SIZE)),
+                vol.Optional(
+                    CONF_DAILY_FROM_HOURLY,
+                    default=data.get(CONF_DAILY_FROM_HOURLY, False),
+                ): bool,
+                vol.Optional(
+                    CONF_GRID_RESOLUTION,
+                    default=data.get(CONF_GRID_RESOLUTION, DEFAULT_GRID_RESOLUTION),
+                ): vol.In(GRID_RESOLUTION_OPTIONS),
+            }
+        )
+        if user_input is not None:
+            data_schema = self.add_suggested_values_to_schema(data_schema, user_input)
+        return self.async_show_form(
+            step_id="update_intervals", data_schema=data_schema, errors=errors
+        )
+
+    @callback
+    def _async_save_locations(self, locations: list[dict[str, Any]]) -> FlowResult:
+        """Store the new location list."""
+        data = {
+            key: value
+            for key, value in self._entry.data.items()
+            if key not in (CONF_LATITUDE, CONF_LONGITUDE)
+        }
+        data[CONF_LOCATIONS] = locations
+        return self._async_save_data(data)
+
+    @callback
+    def _async_save_data(self, data: dict[str, Any]) -> FlowResult:
+        """Store the new entry data; the update listener reloads the entry."""
+        self.hass.config_entries.async_update_entry(self._entry, data=data)
+        return self.async_create_entry(title="", data=dict(self._entry.options))
+
+
+def _intervals_schema(defaults: dict[str, int]) -> dict[vol.Optional, Any]:
+    """Return the schema fields of the per-endpoint refresh intervals.
+
+    The current value is always offered, so entries configured with an
+    interval that is no longer listed keep a valid default.
+    """
+    return {
+        vol.Optional(CONF_CURRENT_INTERVAL, default=defaults[ENDPOINT_CURRENT]): vol.In(
+            sorted({*CURRENT_INTERVALS, defaults[ENDPOINT_CURRENT]})
+        ),
+        vol.Optional(CONF_HOURLY_INTERVAL, default=defaults[ENDPOINT_HOURLY]): vol.In(
+            sorted({*HOURLY_INTERVALS, defaults[ENDPOINT_HOURLY]})
+        ),
+        vol.Optional(CONF_DAILY_INTERVAL, default=defaults[ENDPOINT_DAILY]): vol.In(
+            sorted({*DAILY_INTERVALS, defaults[ENDPOINT_DAILY]})
+        ),
+    }
+
+
+def _location_configured(hass: HomeAssistant, latitude: float, longitude: float) -> bool:
+    """Return True if any entry already has a location at these coordinates."""
+    return any(
+        location[CONF_LATITUDE] == latitude and location[CONF_LONGITUDE] == longitude
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        for location in get_locations(entry)
+    )
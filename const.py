@@ -8,30 +8,247 @@ CURRENT_CONDITIONS_ENDPOINT = f"{API_BASE_URL}/currentConditions:lookup"
 DAILY_FORECAST_ENDPOINT = f"{API_BASE_URL}/forecast/days:lookup"
 HOURLY_FORECAST_ENDPOINT = f"{API_BASE_URL}/forecast/hours:lookup"
 
+# Claves de cada endpoint en los datos del coordinador
+ENDPOINT_CURRENT = "current"
+ENDPOINT_DAILY = "forecast"
+ENDPOINT_HOURLY = "hourly"
+ENDPOINTS = (ENDPOINT_CURRENT, ENDPOINT_DAILY, ENDPOINT_HOURLY)
+
+# Campos de las condiciones actuales que lee la entidad weather; de ellos y de
+# los de los sensores sale la máscara de campos de la petición
+WEATHER_CURRENT_FIELDS = (
+    "weatherCondition.type",
+    "isDaytime",
+    "temperature.degrees",
+    "feelsLikeTemperature.degrees",
+    "relativeHumidity",
+    "airPressure.meanSeaLevelMillibars",
+    "wind.speed.value",
+    "wind.direction.degrees",
+    "visibility.value",
+    "uvIndex",
+    "cloudCover",
+)
+# Campo de las condiciones actuales que lee cada sensor, por clave del sensor
+SENSOR_CURRENT_FIELDS = {
+    "uv_index": "uvIndex",
+    "dew_point": "dewPoint.degrees",
+    "heat_index": "heatIndex.degrees",
+    "wind_chill": "windChill.degrees",
+    "wind_gust": "wind.gust.value",
+    "wind_direction": "wind.direction.cardinal",
+    "cloud_cover": "cloudCover",
+    "thunderstorm_probability": "thunderstormProbability",
+    "precipitation_probability": "precipitation.probability.percent",
+    "precipitation_amount": "precipitation.qpf.quantity",
+}
+
 # Configuration
 CONF_API_KEY = "api_key"
 CONF_LATITUDE = "latitude"
 CONF_LONGITUDE = "longitude"
 CONF_UNITS = "units"
-CONF_UPDATE_INTERVAL = "update_interval"
+CONF_UPDATE_INTERVAL = "update_interval"  # intervalo único de versiones anteriores
+CONF_CURRENT_INTERVAL = "current_interval"
+CONF_DAILY_INTERVAL = "daily_interval"
+CONF_HOURLY_INTERVAL = "hourly_interval"
 CONF_HOURLY_FORECAST_HOURS = "hourly_forecast_hours"
+CONF_NAME = "name"
+CONF_LOCATIONS = "locations"
+CONF_LOCATION_ID = "id"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MONTHLY_BUDGET = "monthly_budget"
+CONF_ADAPTIVE_BUDGET = "adaptive_budget"
+CONF_HOURLY_PAGE_SIZE = "hourly_page_size"
+CONF_GRID_RESOLUTION = "grid_resolution"
+CONF_DAILY_FROM_HOURLY = "daily_from_hourly"
+
+# Identificador de la primera ubicación (conserva los unique_id anteriores)
+LOCATION_PRIMARY_ID = "primary"
+
+# Claves en hass.data[DOMAIN]
+DATA_TRANSPORT = "transport"
+DATA_USAGE = "usage"
+DATA_BREAKERS = "breakers"
+DATA_GRID = "grid"
+DATA_BUDGETS = "budgets"
 
 # Defaults
 DEFAULT_NAME = "Google Maps Weather"
 DEFAULT_UNITS = "METRIC"
-DEFAULT_UPDATE_INTERVAL = 120  # 120 minutos = ~720 llamadas/mes (3 llamadas por actualización)
+DEFAULT_CURRENT_INTERVAL = 120  # ~360 llamadas/mes
+DEFAULT_HOURLY_INTERVAL = 120  # ~360 llamadas/mes
+DEFAULT_DAILY_INTERVAL = 360  # ~120 llamadas/mes (el pronóstico diario apenas cambia)
 DEFAULT_HOURLY_FORECAST_HOURS = 48  # 48 horas por defecto
+# El pronóstico horario llega paginado: como máximo 24 horas por página, y
+# cada página es una llamada a la API
+HOURLY_MAX_PAGE_SIZE = 24
+DEFAULT_HOURLY_PAGE_SIZE = HOURLY_MAX_PAGE_SIZE
+# Rejilla de coordenadas: las ubicaciones de una misma celda comparten las
+# llamadas a la API (0: coordenadas exactas)
+DEFAULT_GRID_RESOLUTION = 0.0
+
+# Transporte HTTP compartido por todas las entradas
+# Las 3 llamadas de una actualización van al mismo host, por lo que se limitan
+# las conexiones por host y se mantienen vivas lo suficiente para reutilizarlas
+# entre las llamadas de una actualización y las de la ubicación siguiente: el
+# keep-alive cubre el mayor hueco entre dos slots del planificador, dentro de
+# estos límites
+TRANSPORT_CONNECTION_LIMIT = 20
+TRANSPORT_LIMIT_PER_HOST = 6
+TRANSPORT_KEEPALIVE_TIMEOUT = 120  # segundos, mínimo
+TRANSPORT_MAX_KEEPALIVE_TIMEOUT = 600  # segundos
+TRANSPORT_DNS_CACHE_TTL = 3600  # segundos
+TRANSPORT_REQUEST_TIMEOUT = 30  # segundos
+TRANSPORT_DRAIN_TIMEOUT = 10  # segundos de espera a peticiones en curso al descargar
+
+# Reintentos de las peticiones fallidas por errores transitorios (red,
+# timeouts, 429 y 5xx), con espera exponencial y jitter completo
+API_MAX_RETRIES = 2  # reintentos tras el primer intento
+API_RETRY_BASE_DELAY = 2  # segundos
+API_RETRY_MAX_DELAY = 30  # segundos; un Retry-After mayor no se espera
+API_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
-# Update interval options (en minutos)
-# Cálculo de llamadas mensuales aproximadas = 3 * (60 * 24 * 30) / intervalo
-# (3 llamadas por actualización: current + daily + hourly)
-UPDATE_INTERVALS = {
-    90: "1.5 horas (~960 llamadas/mes) - Dentro del límite",
-    120: "2 horas (~720 llamadas/mes) - Recomendado",
-    150: "2.5 horas (~576 llamadas/mes) - Conservador",
-    180: "3 horas (~480 llamadas/mes) - Muy conservador",
-    240: "4 horas (~360 llamadas/mes) - Ultra conservador",
+# Circuit breaker por clave API: tras varios fallos seguidos se deja de llamar
+# a la API durante un tiempo que se duplica en cada apertura consecutiva
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 60  # segundos
+BREAKER_MAX_RESET_TIMEOUT = 1800  # segundos
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+# Planificador de refrescos escalonados entre ubicaciones
+SCHEDULER_MAX_CONCURRENCY = 4  # ubicaciones refrescándose a la vez
+SCHEDULER_JITTER_FRACTION = 0.1  # fracción del hueco entre ubicaciones
+SCHEDULER_MAX_JITTER = 60  # segundos
+# Ritmo mínimo del planificador: por debajo, los intervalos se redondean
+SCHEDULER_MIN_INTERVAL = 15  # minutos
+# Primer refresco tras el arranque: las ubicaciones que ya muestran su último
+# estado conocido esperan un retraso aleatorio de hasta estos segundos
+STARTUP_REFRESH_MAX_DELAY = 30
+
+# Caché persistente de respuestas (sobrevive a reinicios y recargas)
+CACHE_STORAGE_VERSION = 1
+CACHE_SAVE_DELAY = 10  # segundos para agrupar escrituras a disco
+# Una respuesta se sirve desde la caché si su edad es menor que el intervalo
+# menos este margen, para que los refrescos programados (con jitter) no la
+# consideren fresca por unos segundos
+CACHE_TTL_MARGIN = 5  # minutos
+
+# Contador real de llamadas por clave API y endpoint, persistido en disco y
+# reiniciado al empezar cada mes en la hora del Pacífico, como la facturación
+# de Google Maps Platform
+USAGE_STORAGE_KEY = f"{DOMAIN}.usage"
+USAGE_BILLING_TIME_ZONE = "America/Los_Angeles"
+USAGE_STORAGE_VERSION = 1
+USAGE_SAVE_DELAY = 30  # segundos
+
+# Fichas del sondeo adaptativo por clave API, persistidas en disco para que
+# reinicios y recargas no den un presupuesto nuevo
+BUDGET_STORAGE_KEY = f"{DOMAIN}.budget"
+BUDGET_STORAGE_VERSION = 1
+BUDGET_SAVE_DELAY = 30  # segundos
+# Con un presupuesto mensual configurado, cada endpoint deja de pedirse al
+# alcanzar esta fracción del presupuesto (el diario es el menos prioritario)
+BUDGET_ENDPOINT_LIMITS = {
+    ENDPOINT_DAILY: 0.8,
+    ENDPOINT_HOURLY: 0.9,
+    ENDPOINT_CURRENT: 1.0,
 }
+# Orden en que se reparte el presupuesto entre los endpoints vencidos
+ENDPOINT_PRIORITY = (ENDPOINT_CURRENT, ENDPOINT_HOURLY, ENDPOINT_DAILY)
+
+# Métricas de rendimiento: límites superiores (ms) de los cubos del
+# histograma de latencia de cada endpoint
+METRICS_LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000)
+# El sensor de escrituras de estado cambia con cada actualización: se
+# escribe como mucho una vez por este intervalo
+STATE_WRITES_SENSOR_INTERVAL = 300  # segundos
+
+# Opciones de intervalo por endpoint (en minutos)
+# Llamadas mensuales aproximadas por ubicación = (60 * 24 * 30) / intervalo
+CURRENT_INTERVALS = {
+    30: "30 min (~1440 llamadas/mes) - Sobrepasa el límite",
+    60: "1 hora (~720 llamadas/mes)",
+    90: "1.5 horas (~480 llamadas/mes)",
+    120: "2 horas (~360 llamadas/mes) - Recomendado",
+    180: "3 horas (~240 llamadas/mes)",
+    240: "4 horas (~180 llamadas/mes)",
+}
+HOURLY_INTERVALS = {
+    60: "1 hora (~720 llamadas/mes)",
+    120: "2 horas (~360 llamadas/mes) - Recomendado",
+    180: "3 horas (~240 llamadas/mes)",
+    240: "4 horas (~180 llamadas/mes)",
+    360: "6 horas (~120 llamadas/mes)",
+}
+DAILY_INTERVALS = {
+    120: "2 horas (~360 llamadas/mes)",
+    240: "4 horas (~180 llamadas/mes)",
+    360: "6 horas (~120 llamadas/mes) - Recomendado",
+    720: "12 horas (~60 llamadas/mes)",
+    1440: "24 horas (~30 llamadas/mes)",
+}
+
+# Clave de configuración del intervalo de cada endpoint
+ENDPOINT_INTERVAL_CONF = {
+    ENDPOINT_CURRENT: CONF_CURRENT_INTERVAL,
+    ENDPOINT_DAILY: CONF_DAILY_INTERVAL,
+    ENDPOINT_HOURLY: CONF_HOURLY_INTERVAL,
+}
+ENDPOINT_INTERVAL_DEFAULTS = {
+    ENDPOINT_CURRENT: DEFAULT_CURRENT_INTERVAL,
+    ENDPOINT_DAILY: DEFAULT_DAILY_INTERVAL,
+    ENDPOINT_HOURLY: DEFAULT_HOURLY_INTERVAL,
+}
+
+# Límite mensual del tier gratuito
+FREE_TIER_MONTHLY_CALLS = 1000
+MINUTES_PER_MONTH = 60 * 24 * 30
+
+# Sondeo adaptativo: los intervalos de condiciones actuales y pronóstico
+# horario se multiplican por un factor según lo cambiante que esté el tiempo,
+# y cada llamada gasta una ficha de un presupuesto mensual que se repone
+# de forma continua (el pronóstico diario mantiene su intervalo)
+CONDITIONS_STORM = "storm"
+CONDITIONS_CHANGING = "changing"
+CONDITIONS_NORMAL = "normal"
+CONDITIONS_STABLE = "stable"
+ADAPTIVE_FACTORS = {
+    CONDITIONS_STORM: 0.25,
+    CONDITIONS_CHANGING: 0.5,
+    CONDITIONS_NORMAL: 1.0,
+    CONDITIONS_STABLE: 2.0,
+}
+ADAPTIVE_MIN_INTERVAL = 15  # minutos, también el ritmo del planificador
+ADAPTIVE_MAX_INTERVAL = 720  # minutos
+ADAPTIVE_LOOKAHEAD_HOURS = 6  # horas del pronóstico horario que se examinan
+ADAPTIVE_STORM_THUNDERSTORM = 40  # % de probabilidad de tormenta
+ADAPTIVE_CHANGING_THUNDERSTORM = 15  # %
+ADAPTIVE_CHANGING_PRECIPITATION_RISE = 30  # puntos de subida de probabilidad
+ADAPTIVE_CHANGING_TEMPERATURE_SWING = 6  # grados entre máxima y mínima
+ADAPTIVE_STABLE_PRECIPITATION = 10  # % máximo de probabilidad de lluvia
+ADAPTIVE_STABLE_TEMPERATURE_SWING = 3  # grados
+# Fichas acumulables: un día de presupuesto
+BUDGET_CAPACITY_DAYS = 1
+DEFAULT_MONTHLY_BUDGET = FREE_TIER_MONTHLY_CALLS
+
+# Agregados del pronóstico horario expuestos como sensores: ventanas a partir
+# de la hora en curso
+DERIVED_PRECIPITATION_HOURS = 3
+DERIVED_LOOKAHEAD_HOURS = 12
+FREEZING_TEMPERATURE = 0  # °C
+
+# Servicio de consulta del pronóstico ya descargado
+SERVICE_QUERY_FORECAST = "query_forecast"
+ATTR_FORECAST_TYPE = "type"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_ATTRIBUTE = "attribute"
+ATTR_ABOVE = "above"
+ATTR_BELOW = "below"
+ATTR_LIMIT = "limit"
 
 # Hourly forecast hours options
 HOURLY_FORECAST_OPTIONS = {
@@ -44,6 +261,19 @@ HOURLY_FORECAST_OPTIONS = {
     240: "240 horas (10 días) - Máximo",
 }
 
+# El pronóstico diario calculado con el horario necesita sus 10 días
+DAILY_FROM_HOURLY_MIN_HOURS = max(HOURLY_FORECAST_OPTIONS)
+
+# Grid resolution options (degrees)
+GRID_RESOLUTION_OPTIONS = {
+    0.0: "Desactivada (coordenadas exactas)",
+    0.001: "0,001° (~100 m)",
+    0.005: "0,005° (~500 m)",
+    0.01: "0,01° (~1 km)",
+    0.05: "0,05° (~5 km)",
+    0.1: "0,1° (~10 km)",
+}
+
 # Mapeo de códigos de condición climática de Google a Home Assistant
 # Home Assistant conditions: clear-night, cloudy, exceptional, fog, hail,
 # lightning, lightning-rainy, partlycloudy, pouring, rainy, snowy,
@@ -0,0 +1,940 @@
+"""Data update coordinator for Google Maps Weather locations."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import replace
+from datetime import datetime, timedelta, tzinfo
+import logging
+import math
+from time import monotonic
+from typing import Any
+import zlib
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .adaptive import CallBudget, assess_conditions
+from .api import ApiResponse, GoogleMapsWeatherAPI
+from .cache import ResponseCache
+from .const import (
+    ADAPTIVE_FACTORS,
+    ADAPTIVE_MAX_INTERVAL,
+    ADAPTIVE_MIN_INTERVAL,
+    BUDGET_ENDPOINT_LIMITS,
+    CACHE_TTL_MARGIN,
+    CONDITIONS_NORMAL,
+    CONF_ADAPTIVE_BUDGET,
+    CONF_ADAPTIVE_POLLING,
+    CONF_DAILY_FROM_HOURLY,
+    CONF_HOURLY_FORECAST_HOURS,
+    CONF_HOURLY_PAGE_SIZE,
+    CONF_LATITUDE,
+    CONF_LOCATION_ID,
+    CONF_LOCATIONS,
+    CONF_LONGITUDE,
+    CONF_MONTHLY_BUDGET,
+    CONF_NAME,
+    CONF_UPDATE_INTERVAL,
+    DEFAULT_HOURLY_FORECAST_HOURS,
+    DEFAULT_HOURLY_PAGE_SIZE,
+    DEFAULT_MONTHLY_BUDGET,
+    DEFAULT_NAME,
+    DOMAIN,
+    ENDPOINT_CURRENT,
+    ENDPOINT_DAILY,
+    ENDPOINT_HOURLY,
+    ENDPOINT_INTERVAL_CONF,
+    ENDPOINT_INTERVAL_DEFAULTS,
+    ENDPOINT_PRIORITY,
+    ENDPOINTS,
+    LOCATION_PRIMARY_ID,
+    SCHEDULER_MIN_INTERVAL,
+)
+from .derived import DerivedMetrics, compute_derived
+from .forecast import ForecastSnapshot, build_daily_forecast
+from .grid import GridCache
+from .metrics import PerformanceMetrics, deep_sizeof
+from .models import (
+    ForecastColumns,
+    daily_from_hourly,
+    decode_daily,
+    decode_hourly,
+    merge_hourly,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_locations(entry: ConfigEntry) -> list[dict[str, Any]]:
+    """Return the locations of a config entry.
+
+    Entries created before multi-location support store a single
+    latitude/longitude pair, which is exposed as the primary location.
+    """
+    if CONF_LOCATIONS in entry.data:
+        return list(entry.data[CONF_LOCATIONS])
+    return [
+        {
+            CONF_LOCATION_ID: LOCATION_PRIMARY_ID,
+            CONF_NAME: DEFAULT_NAME,
+            CONF_LATITUDE: entry.data[CONF_LATITUDE],
+            CONF_LONGITUDE: entry.data[CONF_LONGITUDE],
+        }
+    ]
+
+
+def get_unique_prefix(entry: ConfigEntry, location_id: str) -> str:
+    """Return the prefix of the unique ids and device identifier of a location.
+
+    The primary location keeps the bare entry id so entities created
+    before multi-location support keep their unique ids.
+    """
+    if location_id == LOCATION_PRIMARY_ID:
+        return entry.entry_id
+    return f"{entry.entry_id}_{location_id}"
+
+
+def get_endpoint_intervals(entry: ConfigEntry) -> dict[str, int]:
+    """Return the configured refresh interval of each endpoint, in minutes.
+
+    Entries created before per-endpoint intervals use their single update
+    interval for every endpoint.
+    """
+    legacy_interval = entry.data.get(CONF_UPDATE_INTERVAL)
+    return {
+        endpoint: entry.data.get(
+            conf, legacy_interval or ENDPOINT_INTERVAL_DEFAULTS[endpoint]
+        )
+        for endpoint, conf in ENDPOINT_INTERVAL_CONF.items()
+    }
+
+
+def get_fetched_endpoints(entry: ConfigEntry) -> tuple[str, ...]:
+    """Return the endpoints requested from the API.
+
+    In hourly-only mode the daily forecast is built from the hourly one and
+    never requested.
+    """
+    if entry.data.get(CONF_DAILY_FROM_HOURLY):
+        return tuple(endpoint for endpoint in ENDPOINTS if endpoint != ENDPOINT_DAILY)
+    return ENDPOINTS
+
+
+def get_refresh_interval(entry: ConfigEntry) -> int:
+    """Return the minutes between two refreshes of each location.
+
+    Every endpoint interval is a multiple of the greatest common divisor of
+    the intervals, so refreshing at it fetches each endpoint on time; it is
+    never shorter than SCHEDULER_MIN_INTERVAL. With adaptive polling
+    endpoints can be due more often than configured, so locations are
+    refreshed at the shortest adaptive interval.
+    """
+    intervals = get_endpoint_intervals(entry)
+    interval = max(
+        math.gcd(*(intervals[endpoint] for endpoint in get_fetched_endpoints(entry))),
+        SCHEDULER_MIN_INTERVAL,
+    )
+    if entry.data.get(CONF_ADAPTIVE_POLLING):
+        return min(interval, ADAPTIVE_MIN_INTERVAL)
+    return interval
+
+
+def get_effective_intervals(entry: ConfigEntry) -> dict[str, int]:
+    """Return the interval at which each endpoint is really fetched, in minutes.
+
+    Locations are refreshed every get_refresh_interval() minutes and an
+    endpoint is fetched on the first refresh where its cached payload has
+    expired. The refresh interval divides the configured intervals, unless
+    they are less than SCHEDULER_MIN_INTERVAL apart: those are rounded to a
+    multiple of it. With adaptive polling these are the intervals under normal
+    conditions. Endpoints that are not requested are left out.
+    """
+    tick = get_refresh_interval(entry)
+    intervals = get_endpoint_intervals(entry)
+    return {
+        endpoint: math.ceil((intervals[endpoint] - CACHE_TTL_MARGIN) / tick) * tick
+        for endpoint in get_fetched_endpoints(entry)
+    }
+
+
+def get_calls_per_fetch(entry: ConfigEntry) -> dict[str, int]:
+    """Return the API calls a fetch of each endpoint costs.
+
+    The hourly forecast comes in pages of at most HOURLY_MAX_PAGE_SIZE hours
+    and every page is a call.
+    """
+    hours = entry.data.get(CONF_HOURLY_FORECAST_HOURS, DEFAULT_HOURLY_FORECAST_HOURS)
+    page_size = entry.data.get(CONF_HOURLY_PAGE_SIZE, DEFAULT_HOURLY_PAGE_SIZE)
+    return {
+        endpoint: math.ceil(hours / page_size) if endpoint == ENDPOINT_HOURLY else 1
+        for endpoint in ENDPOINTS
+    }
+
+
+def get_monthly_budget(entry: ConfigEntry) -> int | None:
+    """Return the enforced monthly call cap of the entry, or None without one.
+
+    The cap is only enforced when the user sets it; 0 or empty means no cap.
+    """
+    return entry.data.get(CONF_MONTHLY_BUDGET) or None
+
+
+def get_adaptive_budget(entry: ConfigEntry) -> int:
+    """Return the monthly calls adaptive polling spreads over the month.
+
+    Entries from before the adaptive budget had its own option used the
+    monthly cap for it.
+    """
+    return (
+        entry.data.get(CONF_ADAPTIVE_BUDGET)
+        or entry.data.get(CONF_MONTHLY_BUDGET)
+        or DEFAULT_MONTHLY_BUDGET
+    )
+
+
+def flatten_payload(payload: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+    """Flatten nested objects into one dict keyed by dotted path.
+
+    Lists are kept as values; every entity then reads its field with a single
+    lookup instead of walking the payload.
+    """
+    flat: dict[str, Any] = {}
+    for key, value in payload.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_payload(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+
+class GoogleMapsWeatherCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Coordinator fetching the weather data of one location.
+
+    The coordinator has no update interval of its own: refreshes are driven
+    by the entry's RefreshScheduler so that locations are spread over time.
+    Each endpoint has its own interval: on every refresh only the endpoints
+    whose cached payload has expired are fetched, and listeners registered
+    with an endpoint as context are only called when that endpoint changed.
+
+    With a call budget (adaptive polling) the intervals of current conditions
+    and hourly forecast follow the weather, and expired endpoints are only
+    fetched while the budget has tokens left.
+
+    In hourly-only mode the daily forecast is not requested: it is built
+    from the hourly forecast whenever that changes, and is as stale as it.
+
+    A response identical to the one the payload in use was decoded from,
+    recognized by its fingerprint, keeps that payload: it is not decoded and,
+    as the data holds the same object, neither the forecasts nor the
+    entities of the endpoint are rebuilt.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        location: dict[str, Any],
+        api: GoogleMapsWeatherAPI,
+        cache: ResponseCache,
+        metrics: PerformanceMetrics,
+        budget: CallBudget | None = None,
+        grid: GridCache | None = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        self.entry = entry
+        self.location = location
+        self.location_id: str = location[CONF_LOCATION_ID]
+        self.location_name: str = location.get(CONF_NAME, DEFAULT_NAME)
+        self.api = api
+        self.cache = cache
+        self.metrics = metrics
+        self.budget = budget
+        self.grid = grid
+        self.monthly_budget = get_monthly_budget(entry)
+        # Estado del tiempo que decide los intervalos en modo adaptativo
+        self.conditions = CONDITIONS_NORMAL
+        self.hourly_forecast_hours = entry.data.get(
+            CONF_HOURLY_FORECAST_HOURS, DEFAULT_HOURLY_FORECAST_HOURS
+        )
+        self.hourly_page_size = entry.data.get(
+            CONF_HOURLY_PAGE_SIZE, DEFAULT_HOURLY_PAGE_SIZE
+        )
+        # Llamadas que cuesta cada endpoint: una por página del horario
+        self.calls_per_fetch = get_calls_per_fetch(entry)
+        # Endpoints que se piden a la API
+        self.endpoints = get_fetched_endpoints(entry)
+        self.daily_from_hourly = ENDPOINT_DAILY not in self.endpoints
+        self.endpoint_intervals = get_endpoint_intervals(entry)
+        self.endpoint_ttl: dict[str, timedelta] = {
+            endpoint: timedelta(minutes=interval - CACHE_TTL_MARGIN)
+            for endpoint, interval in self.endpoint_intervals.items()
+        }
+        # Endpoints cuyo payload cambió en la última actualización
+        self.updated_endpoints: set[str] = set(ENDPOINTS)
+        # Endpoints cuya última petición falló y se sirven con datos viejos
+        self.stale_endpoints: set[str] = set()
+        self.endpoint_errors: dict[str, str] = {}
+        self._listeners_available = True
+        # Condiciones actuales aplanadas: {"wind.gust.value": 25, ...}
+        self.current: dict[str, Any] = {}
+        self._forecast: ForecastSnapshot | None = None
+        # Agregados del pronóstico horario: columnas y hora para las que se
+        # calcularon
+        self._derived: tuple[ForecastColumns, int, DerivedMetrics] | None = None
+        # Los pronósticos se guardan decodificados por columnas; del payload
+        # de la API solo se conservan las condiciones actuales. Cada endpoint
+        # devuelve su payload y la huella de la respuesta
+        self._fetchers: dict[str, Callable[[], Awaitable[tuple[Any, Any]]]] = {
+            ENDPOINT_CURRENT: self._async_fetch_current,
+            ENDPOINT_DAILY: self._async_fetch_daily,
+            ENDPOINT_HOURLY: self._async_fetch_hourly,
+        }
+        # Páginas del pronóstico horario pendientes de cargar tras la
+        # actualización en curso, y la tarea que las está cargando
+        self._hourly_pending: tuple[
+            list[ApiResponse],
+            AsyncIterator[ApiResponse],
+            ForecastColumns | None,
+            dict[str, str],
+        ] | None = None
+        self._hourly_task: asyncio.Task[None] | None = None
+        # Refresco en curso, al que se unen los que se solapen con él
+        self._refresh_task: asyncio.Task[None] | None = None
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {self.location_name}",
+            update_interval=None,
+        )
+
+    @property
+    def unique_prefix(self) -> str:
+        """Return the prefix used for unique ids and device identifiers."""
+        return get_unique_prefix(self.entry, self.location_id)
+
+    @property
+    def cell(self) -> str:
+        """Return the grid cell of the location: the coordinates it requests."""
+        return f"{self.api.latitude},{self.api.longitude}"
+
+    @property
+    def forecast(self) -> ForecastSnapshot | None:
+        """Return the parsed forecasts of the current data."""
+        if self.data is None:
+            return None
+        # Solo se vuelve a construir el pronóstico diario si cambió la fecha local
+        return self._update_forecast(self.data, set())
+
+    @property
+    def derived(self) -> DerivedMetrics | None:
+        """Return the aggregates of the hourly forecast for the hour in progress.
+
+        They are computed once per hour and per new forecast, however many
+        sensors read them.
+        """
+        if (snapshot := self.forecast) is None:
+            return None
+        now = dt_util.utcnow()
+        hour = int(now.timestamp()) // 3600
+        derived = self._derived
+        if derived is None or derived[0] is not snapshot.hourly or derived[1] != hour:
+            derived = self._derived = (
+                snapshot.hourly,
+                hour,
+                compute_derived(snapshot.hourly, now, self._time_zone()),
+            )
+        return derived[2]
+
+    def _request_key(self, endpoint: str) -> str:
+        """Return the key identifying the request behind a cached payload."""
+        key = f"{self.api.latitude},{self.api.longitude},{self.api.units}"
+        if endpoint == ENDPOINT_HOURLY:
+            key += f",{self.hourly_forecast_hours}"
+        if mask := self.api.field_masks.get(endpoint):
+            # Otra máscara de campos (nuevas entidades) invalida la respuesta
+            key += f",{zlib.crc32(mask.encode()):08x}"
+        return key
+
+    @callback
+    def async_restore(self) -> bool:
+        """Start from the cached payloads of the location, whatever their age.
+
+        Entities come up with the last known state and the first refresh
+        replaces what has expired. Without any cached payload the location
+        stays unavailable until then; returns whether anything was restored.
+        """
+        data = {
+            endpoint: payload
+            for endpoint in self.endpoints
+            if (
+                payload := self.cache.get(
+                    self.location_id, endpoint, self._request_key(endpoint)
+                )
+            )
+            is not None
+        }
+        if not data:
+            self.last_update_success = False
+            return False
+        self._process_data(data, set())
+        self.data = data
+        return True
+
+    async def async_refresh(self) -> None:
+        """Refresh the data, joining the refresh in progress if any.
+
+        Scheduled refreshes, refreshes requested by entities and the initial
+        one may overlap; callers of an overlapping refresh wait for the one
+        in progress instead of fetching the same endpoints again.
+        """
+        if self._refresh_task is None:
+            # Ligado a la entrada: se cancela al descargarla
+            self._refresh_task = self.entry.async_create_background_task(
+                self.hass,
+                super().async_refresh(),
+                f"{DOMAIN} {self.location_name} refresh",
+            )
+            self._refresh_task.add_done_callback(self._async_refresh_done)
+        else:
+            self.metrics.refreshes_coalesced += 1
+        # Si se cancela quien espera, el refresco sigue para los demás
+        await asyncio.shield(self._refresh_task)
+
+    @callback
+    def _async_refresh_done(self, _task: asyncio.Task[None]) -> None:
+        """Forget the finished refresh."""
+        self._refresh_task = None
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Fetch data from API, skipping endpoints with a fresh cached payload."""
+        start = monotonic()
+        try:
+            data = await self._async_fetch_data()
+        finally:
+            self.metrics.update_cycle.add(monotonic() - start)
+            pending, self._hourly_pending = self._hourly_pending, None
+        if pending is not None:
+            # Se lanza al terminar, para que los datos de esta actualización
+            # ya estén publicados cuando lleguen las demás páginas
+            self._hourly_task = self.entry.async_create_background_task(
+                self.hass,
+                self._async_fetch_hourly_pages(*pending),
+                f"{DOMAIN} {self.location_name} hourly forecast pages",
+            )
+        return data
+
+    async def _async_fetch_current(self) -> tuple[dict[str, Any], str]:
+        """Fetch the current conditions and the fingerprint of the response."""
+        response = await self.api.fetch_current_conditions()
+        if (payload := self._unchanged(ENDPOINT_CURRENT, response.fingerprint)) is None:
+            payload = response.json()
+        return payload, response.fingerprint
+
+    async def _async_fetch_daily(self) -> tuple[ForecastColumns, str]:
+        """Fetch the daily forecast and the fingerprint of the response."""
+        response = await self.api.fetch_daily_forecast()
+        if (payload := self._unchanged(ENDPOINT_DAILY, response.fingerprint)) is None:
+            payload = decode_daily(response.json())
+        return payload, response.fingerprint
+
+    def _unchanged(self, endpoint: str, fingerprint: Any) -> Any:
+        """Return the cached payload if the response it came from had this fingerprint."""
+        key = self._request_key(endpoint)
+        metrics = self.metrics.endpoint(endpoint)
+        if (
+            fingerprint == self.cache.fingerprint(self.location_id, endpoint, key)
+            and (payload := self.cache.get(self.location_id, endpoint, key)) is not None
+        ):
+            metrics.payloads_unchanged += 1
+            return payload
+        metrics.payloads_changed += 1
+        return None
+
+    async def _async_fetch_hourly(self) -> tuple[ForecastColumns, dict[str, str]]:
+        """Fetch the first page of the hourly forecast.
+
+        The remaining pages load in the background once the update is done.
+        Until they arrive, the hours after the first page are taken from the
+        previous forecast, so the horizon stays complete; a first page
+        identical to the previous one keeps the previous forecast as it is.
+        """
+        if self._hourly_task is not None:
+            # Las páginas de la actualización anterior ya no hacen falta; si
+            # el pronóstico horario no se vuelve a pedir, siguen cargándose
+            self._hourly_task.cancel()
+            self._hourly_task = None
+        key = self._request_key(ENDPOINT_HOURLY)
+        previous = self.cache.get(self.location_id, ENDPOINT_HOURLY, key)
+        # Huella de cada página recibida -> token de la página siguiente
+        known = self.cache.fingerprint(self.location_id, ENDPOINT_HOURLY, key) or {}
+        pages = self.api.async_hourly_forecast_pages(
+            self.hourly_forecast_hours, self.hourly_page_size, known
+        )
+        page = await anext(pages)
+        if not page.next_page_token:
+            await pages.aclose()
+            return self._hourly_forecast([page], previous, known, True)
+        self._hourly_pending = ([page], pages, previous, known)
+        fingerprints = self._hourly_fingerprints([page], known, False)
+        if previous is not None and page.fingerprint in known:
+            return previous, fingerprints
+        return merge_hourly([decode_hourly(page.json())], previous), fingerprints
+
+    def _hourly_forecast(
+        self,
+        received: list[ApiResponse],
+        previous: ForecastColumns | None,
+        known: dict[str, str],
+        complete: bool,
+    ) -> tuple[ForecastColumns, dict[str, str]]:
+        """Return the hourly forecast of the pages received and their fingerprints.
+
+        When every page is identical to those of the previous forecast, the
+        previous forecast is returned and no page is decoded. A complete
+        forecast replaces the previous one; an incomplete one is completed
+        with the later hours of the previous one.
+        """
+        fingerprints = self._hourly_fingerprints(received, known, complete)
+        metrics = self.metrics.endpoint(ENDPOINT_HOURLY)
+        if previous is not None and fingerprints == known:
+            metrics.payloads_unchanged += 1
+            return previous, fingerprints
+        metrics.payloads_changed += 1
+        columns = [decode_hourly(page.json()) for page in received]
+        # Con todas las páginas no queda nada del anterior que conservar
+        return merge_hourly(columns, None if complete else previous), fingerprints
+
+    def _hourly_fingerprints(
+        self, received: list[ApiResponse], known: dict[str, str], complete: bool
+    ) -> dict[str, str]:
+        """Return the fingerprints to cache with an hourly forecast.
+
+        Those of a complete forecast replace the known ones. Those of an
+        incomplete one are added to the known ones, so the pages that were
+        not requested again are still recognized next time.
+        """
+        fingerprints = {page.fingerprint: page.next_page_token or "" for page in received}
+        if not complete:
+            # Las más recientes al final; se guardan como mucho tantas como
+            # páginas tiene el pronóstico
+            fingerprints = {
+                **{
+                    fingerprint: token
+                    for fingerprint, token in known.items()
+                    if fingerprint not in fingerprints
+                },
+                **fingerprints,
+            }
+            fingerprints = dict(
+                list(fingerprints.items())[-self.calls_per_fetch[ENDPOINT_HOURLY]:]
+            )
+        return fingerprints
+
+    async def _async_fetch_hourly_pages(
+        self,
+        received: list[ApiResponse],
+        pages: AsyncIterator[ApiResponse],
+        previous: ForecastColumns | None,
+        known: dict[str, str],
+    ) -> None:
+        """Load the remaining hourly pages and publish the merged forecast."""
+        complete = False
+        try:
+            while True:
+                if self._budget_reached(ENDPOINT_HOURLY):
+                    # El presupuesto se agotó mientras se cargaban las páginas
+                    self.metrics.endpoint(ENDPOINT_HOURLY).deferred += 1
+                    _LOGGER.debug(
+                        "Presupuesto agotado para %s: se dejan %s páginas del horario",
+                        self.location_name,
+                        self.calls_per_fetch[ENDPOINT_HOURLY] - len(received),
+                    )
+                    await pages.aclose()
+                    break
+                try:
+                    page = await anext(pages)
+                except StopAsyncIteration:
+                    complete = True
+                    break
+                received.append(page)
+        except Exception as err:  # pylint: disable=broad-except
+            # Lo recibido se publica igualmente, completado con lo anterior
+            self.endpoint_errors[ENDPOINT_HOURLY] = str(err)
+            _LOGGER.warning(
+                "Error communicating with API for %s (hourly, page %s): %s",
+                self.location_name,
+                len(received) + 1,
+                err,
+            )
+        forecast, fingerprints = self._hourly_forecast(received, previous, known, complete)
+        self.cache.async_set(
+            self.location_id,
+            ENDPOINT_HOURLY,
+            self._request_key(ENDPOINT_HOURLY),
+            forecast,
+            fingerprint=fingerprints,
+        )
+        if complete:
+            self._async_share(ENDPOINT_HOURLY, forecast, fingerprints)
+        if self.data is None or self._hourly_task is not asyncio.current_task():
+            return
+        self._hourly_task = None
+        if forecast is self.data.get(ENDPOINT_HOURLY):
+            # Las mismas páginas que ya se mostraban: nada que publicar
+            return
+        data = {**self.data, ENDPOINT_HOURLY: forecast}
+        self._process_data(data, self.stale_endpoints)
+        _LOGGER.debug(
+            "Pronóstico horario de %s completo: %s páginas",
+            self.location_name,
+            len(received),
+        )
+        self.async_set_updated_data(data)
+
+    async def _async_fetch_data(self) -> dict[str, Any]:
+        """Fetch the due endpoints and build the data of this update."""
+        data: dict[str, Any] = {}
+        due: list[str] = []
+        for endpoint in self.endpoints:
+            payload = self.cache.get_fresh(
+                self.location_id,
+                endpoint,
+                self._request_key(endpoint),
+                self._ttl(endpoint),
+            )
+            if payload is None and self.grid is not None:
+                payload = self._from_grid(endpoint)
+            if payload is None:
+                due.append(endpoint)
+            else:
+                data[endpoint] = payload
+
+        if due and (self.budget is not None or self.monthly_budget is not None):
+            due = self._within_budget(due, data)
+            if not due and not data:
+                raise UpdateFailed("Monthly API call budget reached")
+
+        if not due:
+            _LOGGER.debug("Datos de %s servidos desde la caché", self.location_name)
+            self._process_data(data, self.stale_endpoints)
+            return data
+
+        # Ejecutar en paralelo solo las llamadas de los endpoints caducados;
+        # cada endpoint se guarda por separado aunque fallen los demás
+        results = await asyncio.gather(
+            *(self._fetchers[endpoint]() for endpoint in due), return_exceptions=True
+        )
+
+        stale: set[str] = set()
+        errors: dict[str, str] = {}
+        for endpoint, result in zip(due, results):
+            if isinstance(result, Exception):
+                errors[endpoint] = str(result)
+                # Se sirve el último payload bueno, si lo hay, marcado como viejo
+                if (
+                    payload := self.cache.get(
+                        self.location_id, endpoint, self._request_key(endpoint)
+                    )
+                ) is not None:
+                    data[endpoint] = payload
+                    stale.add(endpoint)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            payload, fingerprint = result
+            data[endpoint] = payload
+            self.cache.async_set(
+                self.location_id,
+                endpoint,
+                self._request_key(endpoint),
+                payload,
+                fingerprint=fingerprint,
+            )
+            # Un pronóstico horario al que aún le faltan páginas no se comparte
+            if endpoint != ENDPOINT_HOURLY or self._hourly_pending is None:
+                self._async_share(endpoint, payload, fingerprint)
+
+        self.endpoint_errors = errors
+        if not data:
+            raise UpdateFailed(f"Error communicating with API: {errors[due[0]]}")
+        if errors:
+            _LOGGER.warning(
+                "Error communicating with API for %s (%s): %s",
+                self.location_name,
+                ", ".join(
+                    f"{endpoint}, last data from {self._fetched_at_display(endpoint)}"
+                    if endpoint in stale
+                    else f"{endpoint}, no data"
+                    for endpoint in errors
+                ),
+                next(iter(errors.values())),
+            )
+        # Los endpoints aplazados o servidos desde la caché siguen como estaban
+        stale |= self.stale_endpoints - set(due)
+
+        _LOGGER.debug(
+            "Datos obtenidos para %s: %s (pronóstico horario de %s horas)",
+            self.location_name,
+            ", ".join(due),
+            self.hourly_forecast_hours
+        )
+
+        self._process_data(data, stale)
+        return data
+
+    def _from_grid(self, endpoint: str) -> Any:
+        """Return a fresh payload fetched by another location of the grid cell."""
+        key = self._request_key(endpoint)
+        if (
+            record := self.grid.get_fresh(
+                self.cell, self.unique_prefix, endpoint, key, self._ttl(endpoint)
+            )
+        ) is None:
+            return None
+        fetched_at, payload, fingerprint = record
+        self.cache.async_set(
+            self.location_id, endpoint, key, payload, fetched_at, fingerprint
+        )
+        return payload
+
+    @callback
+    def _async_share(self, endpoint: str, payload: Any, fingerprint: Any) -> None:
+        """Share a fetched payload with the other locations of the grid cell."""
+        if self.grid is not None:
+            self.grid.async_set(
+                self.cell,
+                self.unique_prefix,
+                endpoint,
+                self._request_key(endpoint),
+                payload,
+                fingerprint,
+            )
+
+    @callback
+    def async_grid_updated(
+        self,
+        endpoint: str,
+        key: str,
+        payload: Any,
+        fetched_at: float,
+        fingerprint: Any,
+    ) -> bool:
+        """Take a payload fetched by another location of the grid cell.
+
+        It is only used when it answers the same request as this location's
+        (same parameters and field mask); the entities of the endpoint are
+        updated at once and the next refresh finds it in the cache. A
+        response identical to the one behind the payload in use only renews
+        its age: the payload is kept and nothing is updated.
+        """
+        if (
+            self.data is None
+            or endpoint not in self.endpoints
+            or key != self._request_key(endpoint)
+        ):
+            return False
+        if (
+            fingerprint is not None
+            and fingerprint == self.cache.fingerprint(self.location_id, endpoint, key)
+            and (cached := self.cache.get(self.location_id, endpoint, key)) is not None
+        ):
+            payload = cached
+        self.cache.async_set(
+            self.location_id, endpoint, key, payload, fetched_at, fingerprint
+        )
+        if payload is self.data.get(endpoint) and endpoint not in self.stale_endpoints:
+            self.metrics.endpoint(endpoint).payloads_unchanged += 1
+            return True
+        self.endpoint_errors.pop(endpoint, None)
+        data = {**self.data, endpoint: payload}
+        self._process_data(data, self.stale_endpoints - {endpoint})
+        self.async_set_updated_data(data)
+        return True
+
+    def fetched_at(self, endpoint: str) -> datetime | None:
+        """Return when the payload of an endpoint in use was fetched."""
+        if endpoint == ENDPOINT_DAILY and self.daily_from_hourly:
+            # El pronóstico diario es del momento en que llegó el horario
+            endpoint = ENDPOINT_HOURLY
+        return self.cache.fetched_at(self.location_id, endpoint)
+
+    def _fetched_at_display(self, endpoint: str) -> str:
+        """Return the fetch time of an endpoint for the logs."""
+        if (fetched_at := self.fetched_at(endpoint)) is None:
+            return "unknown"
+        return dt_util.as_local(fetched_at).strftime("%Y-%m-%d %H:%M")
+
+    def _ttl(self, endpoint: str) -> timedelta:
+        """Return how long a cached payload of the endpoint stays fresh."""
+        if self.budget is None or endpoint == ENDPOINT_DAILY:
+            return self.endpoint_ttl[endpoint]
+        interval = self.endpoint_intervals[endpoint] * ADAPTIVE_FACTORS[self.conditions]
+        interval = min(max(interval, ADAPTIVE_MIN_INTERVAL), ADAPTIVE_MAX_INTERVAL)
+        return timedelta(minutes=interval - CACHE_TTL_MARGIN)
+
+    def _within_budget(self, due: list[str], data: dict[str, Any]) -> list[str]:
+        """Return the due endpoints the budget can pay for.
+
+        With a monthly budget configured, an endpoint is no longer fetched
+        once the calls made with the API key this month reach its share of
+        the budget, so lower-priority endpoints stop first. With adaptive
+        polling every call also needs a token. Endpoints left out keep their
+        last payload; one without any payload is fetched until the budget is
+        used up. A fetch of the hourly forecast costs a call per page.
+        """
+        allowed: list[str] = []
+        planned = 0
+        for endpoint in sorted(due, key=ENDPOINT_PRIORITY.index):
+            calls = self.calls_per_fetch[endpoint]
+            stale = self.cache.get(
+                self.location_id, endpoint, self._request_key(endpoint)
+            )
+            if self.monthly_budget is not None and self.api.usage is not None:
+                used = self.api.usage.total(self.api.api_key) + planned
+                share = BUDGET_ENDPOINT_LIMITS[endpoint] if stale is not None else 1.0
+                # Sin datos de respaldo basta con que quede presupuesto
+                needed = calls if stale is not None else 1
+                if used + needed > self.monthly_budget * share:
+                    self.metrics.endpoint(endpoint).deferred += 1
+                    if stale is not None:
+                        data[endpoint] = stale
+                    continue
+            if self.budget is not None:
+                if stale is None:
+                    self.budget.consume(calls)
+                elif not self.budget.try_consume(calls):
+                    self.metrics.endpoint(endpoint).deferred += 1
+                    data[endpoint] = stale
+                    continue
+            allowed.append(endpoint)
+            planned += calls
+        if len(allowed) < len(due):
+            _LOGGER.debug(
+                "Presupuesto agotado para %s: se aplazan %s",
+                self.location_name,
+                ", ".join(endpoint for endpoint in due if endpoint not in allowed),
+            )
+        return allowed
+
+    def _budget_reached(self, endpoint: str) -> bool:
+        """Return whether the monthly budget has no room left for the endpoint."""
+        if self.monthly_budget is None or self.api.usage is None:
+            return False
+        return (
+            self.api.usage.total(self.api.api_key)
+            >= self.monthly_budget * BUDGET_ENDPOINT_LIMITS[endpoint]
+        )
+
+    def _process_data(self, data: dict[str, Any], stale: set[str]) -> None:
+        """Rebuild what the entities read from the endpoints that changed.
+
+        stale holds the endpoints served from their last good payload after
+        a failed request; entities of an endpoint whose staleness changed are
+        updated too.
+        """
+        # Los payloads servidos desde la caché son el mismo objeto que ya
+        # estaba en self.data, así que basta con comparar identidades
+        previous = self.data or {}
+        if self.daily_from_hourly:
+            stale = self._derive_daily(data, previous, stale)
+        changed = {
+            endpoint
+            for endpoint in ENDPOINTS
+            if data.get(endpoint) is not previous.get(endpoint)
+        }
+        self.updated_endpoints = changed | (stale ^ self.stale_endpoints)
+        self.stale_endpoints = stale
+        if ENDPOINT_CURRENT in changed:
+            self.current = flatten_payload(data.get(ENDPOINT_CURRENT) or {})
+        self._update_forecast(data, changed)
+        if changed:
+            # Memoria que retiene la ubicación: datos, sensores y snapshot
+            self.metrics.data_memory[self.location_id] = deep_sizeof(
+                (data, self.current, self._forecast)
+            )
+        if self.budget is not None and changed:
+            conditions = assess_conditions(
+                self.current, self._forecast, dt_util.utcnow()
+            )
+            if conditions != self.conditions:
+                _LOGGER.debug(
+                    "Tiempo en %s: %s -> %s", self.location_name, self.conditions, conditions
+                )
+                self.conditions = conditions
+
+    def _derive_daily(
+        self, data: dict[str, Any], previous: dict[str, Any], stale: set[str]
+    ) -> set[str]:
+        """Put the daily forecast built from the hourly one into data.
+
+        It is only rebuilt when the hourly forecast changed. Returns the
+        stale endpoints, with the daily forecast stale when the hourly is.
+        """
+        hourly = data.get(ENDPOINT_HOURLY)
+        if hourly is None:
+            data.pop(ENDPOINT_DAILY, None)
+        elif hourly is previous.get(ENDPOINT_HOURLY) and ENDPOINT_DAILY in previous:
+            data[ENDPOINT_DAILY] = previous[ENDPOINT_DAILY]
+        else:
+            data[ENDPOINT_DAILY] = daily_from_hourly(hourly, self._time_zone())
+        if ENDPOINT_HOURLY in stale:
+            return stale | {ENDPOINT_DAILY}
+        return stale - {ENDPOINT_DAILY}
+
+    def _update_forecast(
+        self, data: dict[str, Any], updated: set[str]
+    ) -> ForecastSnapshot:
+        """Build a new snapshot from the forecasts that changed.
+
+        The daily forecast is also rebuilt when the local date rolled over
+        since the snapshot was built, as it drops the days already past.
+        """
+        start = monotonic()
+        time_zone = self._time_zone()
+        today = dt_util.now(time_zone).date()
+        snapshot = self._forecast
+        changes: dict[str, Any] = {}
+        if (
+            snapshot is None
+            or ENDPOINT_DAILY in updated
+            or snapshot.local_date != today
+        ):
+            changes["local_date"] = today
+            changes["daily"] = build_daily_forecast(
+                data.get(ENDPOINT_DAILY), time_zone, today
+            )
+        if snapshot is None or ENDPOINT_HOURLY in updated:
+            changes["hourly"] = data.get(ENDPOINT_HOURLY) or ForecastColumns.from_rows(())
+        if changes:
+            self.metrics.forecast_build.add(monotonic() - start)
+            snapshot = (
+                ForecastSnapshot(**changes)
+                if snapshot is None
+                else replace(snapshot, **changes)
+            )
+            self._forecast = snapshot
+        return snapshot
+
+    def _time_zone(self) -> tzinfo:
+        """Return the time zone configured in Home Assistant."""
+        if self.hass.config.time_zone:
+            return dt_util.get_time_zone(self.hass.config.time_zone) or dt_util.DEFAULT_TIME_ZONE
+        return dt_util.DEFAULT_TIME_ZONE
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners of the endpoints that changed.
+
+        Listeners without context are always called; a change of
+        availability reaches every listener.
+        """
+        if self.last_update_success != self._listeners_available:
+            self._listeners_available = self.last_update_success
+            self.updated_endpoints = set(ENDPOINTS)
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context in self.updated_endpoints:
+                update_callback()
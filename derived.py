@@ -0,0 +1,69 @@
+"""Aggregates of the hourly forecast for Google Maps Weather."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, tzinfo
+
+from .const import (
+    DERIVED_LOOKAHEAD_HOURS,
+    DERIVED_PRECIPITATION_HOURS,
+    FREEZING_TEMPERATURE,
+)
+from .models import ForecastColumns
+
+
+@dataclass(frozen=True, slots=True)
+class DerivedMetrics:
+    """Rolling-window aggregates of the hourly forecast at one hour."""
+
+    precipitation_next_hours: float | None
+    precipitation_probability_max: int | None
+    wind_gust_max: float | None
+    hours_until_freezing: int | None
+    temperature_max_today: float | None
+    temperature_min_today: float | None
+
+
+def compute_derived(
+    hourly: ForecastColumns, now: datetime, time_zone: tzinfo
+) -> DerivedMetrics:
+    """Compute every aggregate in one pass over slices of the columns.
+
+    Windows start at the hour in progress. Hours until freezing counts whole
+    hours from it, and is None when no hour of the forecast is at or below
+    freezing. The minimum and maximum of today cover the hours of the local
+    date still in the forecast.
+    """
+    start = hourly.start
+    # Hora en curso: la última que empezó hace menos de una hora
+    first = bisect_right(start, now.timestamp() - 3600)
+    if first == len(start):
+        return DerivedMetrics(None, None, None, None, None, None)
+
+    precipitation = hourly.precipitation[first:first + DERIVED_PRECIPITATION_HOURS]
+    lookahead = slice(first, first + DERIVED_LOOKAHEAD_HOURS)
+    gusts = [gust for gust in hourly.wind_gust[lookahead] if gust == gust]  # sin NaN
+
+    hours_until_freezing = None
+    for index, temperature in enumerate(hourly.temperature[first:]):
+        if temperature <= FREEZING_TEMPERATURE:
+            hours_until_freezing = (start[first + index] - start[first]) // 3600
+            break
+
+    local_now = now.astimezone(time_zone)
+    midnight = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today = hourly.temperature[
+        bisect_left(start, midnight.timestamp()):bisect_left(
+            start, (midnight + timedelta(days=1)).timestamp()
+        )
+    ]
+
+    return DerivedMetrics(
+        precipitation_next_hours=round(sum(precipitation), 2),
+        precipitation_probability_max=max(hourly.precipitation_probability[lookahead]),
+        wind_gust_max=max(gusts, default=None),
+        hours_until_freezing=hours_until_freezing,
+        temperature_max_today=max(today, default=None),
+        temperature_min_today=min(today, default=None),
+    )
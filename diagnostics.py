@@ -0,0 +1,71 @@
+"""Diagnostics support for Google Maps Weather."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_KEY, DOMAIN, ENDPOINTS
+from .coordinator import (
+    GoogleMapsWeatherCoordinator,
+    get_effective_intervals,
+)
+
+TO_REDACT = {CONF_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinators: dict[str, GoogleMapsWeatherCoordinator] = entry_data["coordinators"]
+    api_key = entry.data[CONF_API_KEY]
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "effective_intervals_minutes": get_effective_intervals(entry),
+        "locations": {
+            location_id: {
+                "name": coordinator.location_name,
+                "last_update_success": coordinator.last_update_success,
+                # Los errores de aiohttp incluyen la URL, y con ella la clave
+                "last_exception": (
+                    str(coordinator.last_exception).replace(api_key, REDACTED)
+                    if coordinator.last_exception
+                    else None
+                ),
+                "updated_endpoints": sorted(coordinator.updated_endpoints),
+                "stale_endpoints": sorted(coordinator.stale_endpoints),
+                "endpoint_errors": {
+                    endpoint: error.replace(api_key, REDACTED)
+                    for endpoint, error in coordinator.endpoint_errors.items()
+                },
+                "fetched_at": {
+                    endpoint: fetched_at.isoformat()
+                    for endpoint in ENDPOINTS
+                    if (fetched_at := coordinator.fetched_at(endpoint))
+                },
+                "conditions": coordinator.conditions,
+            }
+            for location_id, coordinator in coordinators.items()
+        },
+        "cache": {
+            "hits": entry_data["cache"].hits,
+            "misses": entry_data["cache"].misses,
+        },
+        "budget": budget.as_dict() if (budget := entry_data["budget"]) else None,
+        "usage": {
+            "month": entry_data["usage"].month,
+            "calls": entry_data["usage"].calls(api_key),
+            "previous_month_total": entry_data["usage"].previous_month_total(api_key),
+        },
+        "circuit_breaker": entry_data["breaker"].as_dict(),
+        "metrics": entry_data["metrics"].as_dict(),
+        "transport": entry_data["transport"].as_dict(),
+        "grid": entry_data["grid"].as_dict(
+            coordinator.cell for coordinator in coordinators.values()
+        ),
+    }
@@ -0,0 +1,84 @@
+"""Base entity for Google Maps Weather."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import GoogleMapsWeatherCoordinator
+
+
+class GoogleMapsWeatherBaseEntity(CoordinatorEntity[GoogleMapsWeatherCoordinator]):
+    """Common base for the entities of one location.
+
+    The coordinator context is the endpoint the entity reads from, so the
+    entity is only updated when that endpoint changed (None: every update).
+    Even then, the state is only written when it differs from the last one
+    written by the entity.
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: GoogleMapsWeatherCoordinator,
+        key: str,
+        context: Any = None,
+    ) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator, context)
+        self._attr_unique_id = f"{coordinator.unique_prefix}_{key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, coordinator.unique_prefix)},
+            name=coordinator.location_name,
+            manufacturer="Google",
+            model="Weather API",
+        )
+        self._written_state: tuple[Any, ...] | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity is added."""
+        await super().async_added_to_hass()
+        # La plataforma escribe el estado inicial justo después de este método
+        self._written_state = self._state_signature()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if it changed."""
+        metrics = self.coordinator.metrics
+        signature = self._state_signature()
+        if signature == self._written_state:
+            metrics.state_writes_skipped += 1
+            return
+        self._written_state = signature
+        metrics.state_writes += 1
+        self.async_write_ha_state()
+
+    def _state_signature(self) -> tuple[Any, ...]:
+        """Return the values that make up the state of the entity."""
+        return (
+            self.available,
+            self.state,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
+
+
+def stale_attributes(
+    coordinator: GoogleMapsWeatherCoordinator, endpoint: str
+) -> dict[str, Any] | None:
+    """Return the attributes marking data kept after a failed request.
+
+    Nothing is added while the data is fresh, so the attributes only change
+    when the endpoint fails or recovers.
+    """
+    if endpoint not in coordinator.stale_endpoints:
+        return None
+    fetched_at = coordinator.fetched_at(endpoint)
+    return {
+        "stale": True,
+        "data_fetched_at": fetched_at.isoformat() if fetched_at else None,
+    }
@@ -0,0 +1,35 @@
+"""Response field masks for Google Maps Weather."""
+from __future__ import annotations
+
+from .adaptive import CURRENT_FIELDS as ADAPTIVE_CURRENT_FIELDS
+from .const import (
+    ENDPOINT_CURRENT,
+    ENDPOINT_DAILY,
+    ENDPOINT_HOURLY,
+    SENSOR_CURRENT_FIELDS,
+    WEATHER_CURRENT_FIELDS,
+)
+from .models import DAILY_FIELDS, HOURLY_FIELDS
+
+
+def build_field_masks() -> dict[str, str]:
+    """Return the field mask of each endpoint.
+
+    Only the fields read by the sensors, the weather entity, the forecast
+    builders and adaptive polling are requested, so the API leaves the rest
+    out of the responses. The fields live outside the platforms, so building
+    the masks does not import them.
+    """
+    current = {
+        *SENSOR_CURRENT_FIELDS.values(),
+        *WEATHER_CURRENT_FIELDS,
+        *ADAPTIVE_CURRENT_FIELDS,
+    }
+    return {
+        ENDPOINT_CURRENT: ",".join(sorted(current)),
+        ENDPOINT_DAILY: ",".join(f"forecastDays.{field}" for field in DAILY_FIELDS),
+        # El token de la página siguiente también hay que pedirlo
+        ENDPOINT_HOURLY: ",".join(
+            ["nextPageToken", *(f"forecastHours.{field}" for field in HOURLY_FIELDS)]
+        ),
+    }
@@ -0,0 +1,89 @@
+"""Forecast parsing for Google Maps Weather."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, datetime, tzinfo
+import logging
+import math
+
+from homeassistant.components.weather import Forecast
+from homeassistant.util import dt as dt_util
+
+from .models import ForecastColumns
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastSnapshot:
+    """Forecasts built once from the data of a coordinator update.
+
+    The daily forecast depends on the local date (past days are dropped), so
+    the snapshot records the date it was built for and is rebuilt when it
+    rolls over. The hourly forecast stays in its compact columns, sorted by
+    start time, so the hours still to come are found with a binary search
+    and only they are turned into forecast entries.
+    """
+
+    local_date: date
+    daily: tuple[Forecast, ...]
+    hourly: ForecastColumns
+
+    def daily_forecast(self) -> list[Forecast] | None:
+        """Return the daily forecast."""
+        return list(self.daily) if self.daily else None
+
+    def hourly_forecast(self, now: datetime, limit: int | None = None) -> list[Forecast] | None:
+        """Return the hourly forecast from now on, up to limit hours."""
+        hourly = self.hourly
+        # Las horas ya empezadas quedan antes del punto de corte
+        first = bisect_left(hourly.start, now.timestamp())
+        last = len(hourly) if limit is None else min(first + limit, len(hourly))
+        forecast = [
+            Forecast(
+                datetime=dt_util.utc_from_timestamp(hourly.start[index]).isoformat(),
+                condition=hourly.condition[index],
+                native_temperature=hourly.temperature[index],
+                native_precipitation=hourly.precipitation[index],
+                precipitation_probability=hourly.precipitation_probability[index],
+            )
+            for index in range(first, last)
+        ]
+        return forecast or None
+
+
+def build_daily_forecast(
+    columns: ForecastColumns | None, time_zone: tzinfo, today: date
+) -> tuple[Forecast, ...]:
+    """Build the daily forecast, skipping days before today."""
+    if columns is None:
+        _LOGGER.warning("No forecast data available in coordinator")
+        return ()
+    if not columns:
+        _LOGGER.warning("No forecast entries were generated")
+        return ()
+
+    _LOGGER.debug(f"Processing {len(columns)} days of forecast (today: {today})")
+
+    forecast_list = []
+    for start, temperature, templow, condition, precipitation, probability, _ in columns.rows():
+        # Convertir la fecha del pronóstico a la zona horaria local
+        local_start = dt_util.utc_from_timestamp(start).astimezone(time_zone)
+        if local_start.date() < today:
+            continue
+        local_midday = local_start.replace(hour=12, minute=0, second=0, microsecond=0)
+
+        # IMPORTANTE: Usar native_temperature (no temperature) para HA 2024.x
+        forecast_list.append(
+            Forecast(
+                datetime=local_midday.isoformat(),
+                condition=condition,
+                native_temperature=temperature,  # Temperatura máxima del día
+                native_templow=None if math.isnan(templow) else templow,  # Temperatura mínima del día
+                native_precipitation=precipitation,
+                precipitation_probability=probability,
+            )
+        )
+
+    return tuple(forecast_list)
@@ -0,0 +1,159 @@
+"""Coordinate grid shared by nearby Google Maps Weather locations."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_GRID, DOMAIN
+
+# Recibe endpoint, clave de la petición, payload, cuándo se obtuvo y la huella
+# de la respuesta; devuelve si la ubicación lo usó
+GridListener = Callable[[str, str, Any, float, Any], bool]
+
+
+def snap_coordinate(value: float, resolution: float) -> float:
+    """Return a coordinate moved to the nearest node of the grid.
+
+    A resolution of 0 leaves the coordinate unchanged.
+    """
+    if not resolution:
+        return value
+    # Sin el redondeo final la celda quedaría como 40.410000000000004
+    return round(round(value / resolution) * resolution, 6)
+
+
+class CellStats:
+    """Locations of a grid cell and how often they shared a fetch."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.locations: set[str] = set()
+        self.fetches = 0
+        self.hits = 0
+
+    @property
+    def hit_rate(self) -> float | None:
+        """Return the percentage of payloads served by another location's fetch."""
+        total = self.fetches + self.hits
+        return round(self.hits / total * 100, 1) if total else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics as a plain dict."""
+        return {
+            "locations": len(self.locations),
+            "fetches": self.fetches,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class GridCache:
+    """Latest payload of every request of every grid cell, shared by all entries.
+
+    Locations whose coordinates snap to the same cell send the same
+    requests. A payload fetched by one of them is pushed at once to the
+    other locations of the cell that use the same request key, and is found
+    here by those refreshing later, as long as it is fresh for them. Fetches
+    and the payloads taken from another location's fetch are counted per
+    cell.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the grid."""
+        self._cells: dict[str, CellStats] = {}
+        # Celda -> (endpoint, clave) -> (ubicación que lo obtuvo, cuándo,
+        # payload, huella de la respuesta)
+        self._records: dict[
+            str, dict[tuple[str, str], tuple[str, float, Any, Any]]
+        ] = {}
+        self._listeners: dict[str, dict[str, GridListener]] = {}
+
+    @callback
+    def async_add_location(
+        self, cell: str, location: str, listener: GridListener
+    ) -> CALLBACK_TYPE:
+        """Register a location in a cell; the callback removes it."""
+        self._cells.setdefault(cell, CellStats()).locations.add(location)
+        self._listeners.setdefault(cell, {})[location] = listener
+
+        @callback
+        def remove_location() -> None:
+            """Remove the location, and the cell once it is empty."""
+            self._cells[cell].locations.discard(location)
+            self._listeners[cell].pop(location, None)
+            if not self._cells[cell].locations:
+                del self._cells[cell]
+                del self._listeners[cell]
+                self._records.pop(cell, None)
+
+        return remove_location
+
+    def get_fresh(
+        self, cell: str, location: str, endpoint: str, key: str, ttl: timedelta
+    ) -> tuple[float, Any, Any] | None:
+        """Return when a payload was fetched, the payload and its fingerprint.
+
+        Only payloads younger than ttl and fetched by another location are
+        returned.
+        """
+        record = self._records.get(cell, {}).get((endpoint, key))
+        if (
+            record is None
+            or record[0] == location
+            or dt_util.utcnow().timestamp() - record[1] >= ttl.total_seconds()
+        ):
+            return None
+        self._cells[cell].hits += 1
+        return record[1:]
+
+    @callback
+    def async_set(
+        self,
+        cell: str,
+        location: str,
+        endpoint: str,
+        key: str,
+        payload: Any,
+        fingerprint: Any = None,
+    ) -> None:
+        """Store a payload fetched by a location and push it to the others.
+
+        The fingerprint of the response lets the others recognize a payload
+        they already have.
+        """
+        fetched_at = dt_util.utcnow().timestamp()
+        self._records.setdefault(cell, {})[(endpoint, key)] = (
+            location,
+            fetched_at,
+            payload,
+            fingerprint,
+        )
+        stats = self._cells[cell]
+        stats.fetches += 1
+        for other, listener in list(self._listeners[cell].items()):
+            if other != location and listener(
+                endpoint, key, payload, fetched_at, fingerprint
+            ):
+                stats.hits += 1
+
+    def as_dict(self, cells: Iterable[str]) -> dict[str, Any]:
+        """Return the statistics of some cells and their overall hit rate."""
+        wanted = {
+            cell: stats for cell in cells if (stats := self._cells.get(cell)) is not None
+        }
+        fetches = sum(stats.fetches for stats in wanted.values())
+        hits = sum(stats.hits for stats in wanted.values())
+        return {
+            "hit_rate": round(hits / (fetches + hits) * 100, 1) if fetches + hits else None,
+            "cells": {cell: stats.as_dict() for cell, stats in wanted.items()},
+        }
+
+
+@callback
+def async_get_grid(hass: HomeAssistant) -> GridCache:
+    """Return the grid shared by every entry."""
+    return hass.data.setdefault(DOMAIN, {}).setdefault(DATA_GRID, GridCache())
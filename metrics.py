@@ -0,0 +1,246 @@
+"""Performance metrics for Google Maps Weather."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable
+import sys
+from typing import Any
+
+from .const import ENDPOINTS, METRICS_LATENCY_BUCKETS
+
+
+class TimingStats:
+    """Running statistics of a duration, optionally with a histogram."""
+
+    def __init__(self, buckets: tuple[float, ...] | None = None) -> None:
+        """Initialize the statistics."""
+        self.count = 0
+        self.total_ms = 0.0
+        self.last_ms: float | None = None
+        self.max_ms: float | None = None
+        self._buckets = buckets
+        # Un cubo por límite más uno para los valores por encima del último
+        self._bucket_counts = [0] * (len(buckets) + 1) if buckets else None
+
+    def add(self, seconds: float) -> None:
+        """Record a duration measured in seconds."""
+        elapsed_ms = seconds * 1000
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        if self.max_ms is None or elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        if self._bucket_counts is not None:
+            self._bucket_counts[bisect_left(self._buckets, elapsed_ms)] += 1
+
+    @property
+    def avg_ms(self) -> float | None:
+        """Return the average duration."""
+        return _round(self.total_ms / self.count) if self.count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics as a plain dict."""
+        stats: dict[str, Any] = {
+            "count": self.count,
+            "last_ms": _round(self.last_ms),
+            "avg_ms": self.avg_ms,
+            "max_ms": _round(self.max_ms),
+        }
+        if self._bucket_counts is not None:
+            labels = [f"<={bound}" for bound in self._buckets]
+            labels.append(f">{self._buckets[-1]}")
+            stats["histogram_ms"] = dict(zip(labels, self._bucket_counts))
+        return stats
+
+
+class EndpointMetrics:
+    """Requests made to one API endpoint."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.latency = TimingStats(METRICS_LATENCY_BUCKETS)
+        self.json_decode = TimingStats()
+        self.status_counts: dict[str, int] = {}
+        self.response_bytes_last: int | None = None
+        self.response_bytes_total = 0
+        self.wire_bytes_last: int | None = None
+        self.wire_bytes_total = 0
+        # Llamadas aplazadas por el presupuesto mensual
+        self.deferred = 0
+        self.retries = 0
+        # Peticiones que se unieron a una idéntica ya en curso
+        self.coalesced = 0
+        # Respuestas distintas e idénticas a la anterior de la ubicación
+        self.payloads_changed = 0
+        self.payloads_unchanged = 0
+
+    def record_status(self, status: int | None) -> None:
+        """Count the HTTP status of a request (None: no response)."""
+        key = str(status) if status is not None else "no_response"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def record_response(self, latency: float, wire_size: int, size: int) -> None:
+        """Record a successful response.
+
+        latency is the time until the whole body was received, in seconds.
+        wire_size is the body as transferred and size once decompressed. Its
+        JSON decode time is recorded when it is decoded, if ever.
+        """
+        self.latency.add(latency)
+        self.wire_bytes_last = wire_size
+        self.wire_bytes_total += wire_size
+        self.response_bytes_last = size
+        self.response_bytes_total += size
+
+    @property
+    def compression_ratio(self) -> float | None:
+        """Return the decompressed bytes received per byte transferred."""
+        if not self.wire_bytes_total:
+            return None
+        return round(self.response_bytes_total / self.wire_bytes_total, 2)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a plain dict."""
+        return {
+            "latency": self.latency.as_dict(),
+            "json_decode": self.json_decode.as_dict(),
+            "status_counts": dict(self.status_counts),
+            "response_bytes_last": self.response_bytes_last,
+            "response_bytes_total": self.response_bytes_total,
+            "wire_bytes_last": self.wire_bytes_last,
+            "wire_bytes_total": self.wire_bytes_total,
+            "compression_ratio": self.compression_ratio,
+            "deferred": self.deferred,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "payloads_changed": self.payloads_changed,
+            "payloads_unchanged": self.payloads_unchanged,
+        }
+
+
+class PerformanceMetrics:
+    """Performance metrics of the locations of a config entry.
+
+    Requests are measured by the API clients, forecast builds, update
+    cycles and retained memory by the coordinators, and state writes by the
+    entities.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.endpoints = {endpoint: EndpointMetrics() for endpoint in ENDPOINTS}
+        self.forecast_build = TimingStats()
+        self.update_cycle = TimingStats()
+        # Refrescos que esperaron a uno ya en curso en lugar de repetirlo
+        self.refreshes_coalesced = 0
+        self.state_writes = 0
+        self.state_writes_skipped = 0
+        # Bytes retenidos por los datos de cada ubicación
+        self.data_memory: dict[str, int] = {}
+
+    def endpoint(self, endpoint: str) -> EndpointMetrics:
+        """Return the metrics of an endpoint."""
+        return self.endpoints[endpoint]
+
+    @property
+    def latency_avg_ms(self) -> float | None:
+        """Return the average latency over every endpoint."""
+        return _weighted_avg(metrics.latency for metrics in self.endpoints.values())
+
+    @property
+    def json_decode_avg_ms(self) -> float | None:
+        """Return the average JSON decode time over every endpoint."""
+        return _weighted_avg(metrics.json_decode for metrics in self.endpoints.values())
+
+    @property
+    def response_bytes_total(self) -> int:
+        """Return the decompressed bytes received from every endpoint."""
+        return sum(metrics.response_bytes_total for metrics in self.endpoints.values())
+
+    @property
+    def wire_bytes_total(self) -> int:
+        """Return the bytes transferred from every endpoint."""
+        return sum(metrics.wire_bytes_total for metrics in self.endpoints.values())
+
+    @property
+    def data_memory_total(self) -> int | None:
+        """Return the bytes retained by the data of every location."""
+        return sum(self.data_memory.values()) if self.data_memory else None
+
+    def data_memory_as_dict(self) -> dict[str, Any]:
+        """Return the bytes retained by each location and their average."""
+        return {
+            "locations": dict(self.data_memory),
+            "average_per_location": (
+                round(sum(self.data_memory.values()) / len(self.data_memory))
+                if self.data_memory
+                else None
+            ),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return every metric as a plain dict."""
+        return {
+            "endpoints": {
+                endpoint: metrics.as_dict()
+                for endpoint, metrics in self.endpoints.items()
+            },
+            "forecast_build": self.forecast_build.as_dict(),
+            "update_cycle": self.update_cycle.as_dict(),
+            "refreshes_coalesced": self.refreshes_coalesced,
+            "state_writes": self.state_writes_as_dict(),
+            "data_memory": self.data_memory_as_dict(),
+        }
+
+    def state_writes_as_dict(self) -> dict[str, Any]:
+        """Return the written and skipped state writes."""
+        total = self.state_writes + self.state_writes_skipped
+        return {
+            "written": self.state_writes,
+            "skipped": self.state_writes_skipped,
+            "skipped_percentage": (
+                round(self.state_writes_skipped / total * 100, 1) if total else None
+            ),
+        }
+
+
+def deep_sizeof(obj: Any, seen: set[int] | None = None) -> int:
+    """Return the bytes used by an object and everything it references.
+
+    Dicts, sequences, sets and slotted objects are followed; an object
+    referenced several times is counted once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(
+            deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif not isinstance(obj, (str, bytes)) and hasattr(obj, "__slots__"):
+        size += sum(
+            deep_sizeof(getattr(obj, name), seen)
+            for name in obj.__slots__
+            if hasattr(obj, name)
+        )
+    return size
+
+
+def _weighted_avg(stats: Iterable[TimingStats]) -> float | None:
+    """Return the average of several TimingStats together."""
+    count = 0
+    total = 0.0
+    for item in stats:
+        count += item.count
+        total += item.total_ms
+    return _round(total / count) if count else None
+
+
+def _round(value: float | None) -> float | None:
+    """Round a millisecond value for display."""
+    return round(value, 1) if value is not None else None
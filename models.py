@@ -0,0 +1,337 @@
+"""Compact forecasts decoded from Google Maps Weather API payloads."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, tzinfo
+import logging
+import math
+import sys
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import CONDITION_MAP
+
+_LOGGER = logging.getLogger(__name__)
+
+# Campos de cada día y cada hora que leen decode_days y decode_hours;
+# el resto no se pide a la API
+DAILY_FIELDS = (
+    "interval.startTime",
+    "maxTemperature.degrees",
+    "minTemperature.degrees",
+    "daytimeForecast.temperature.degrees",
+    "daytimeForecast.maxTemperature.degrees",
+    "daytimeForecast.weatherCondition.type",
+    "daytimeForecast.precipitation.qpf.quantity",
+    "daytimeForecast.precipitation.probability.percent",
+    "nighttimeForecast.temperature.degrees",
+    "nighttimeForecast.minTemperature.degrees",
+)
+HOURLY_FIELDS = (
+    "interval.startTime",
+    "temperature.degrees",
+    "weatherCondition.type",
+    "isDaytime",
+    "precipitation.qpf.quantity",
+    "precipitation.probability.percent",
+    "wind.gust.value",
+)
+
+
+# Fila de un pronóstico: inicio (epoch UTC), temperatura, mínima, condición,
+# precipitación, probabilidad de precipitación y racha de viento
+Row = tuple[int, float, float, str, float, int, float]
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastColumns:
+    """Forecast entries stored column by column, sorted by start time.
+
+    Only the fields exposed by the weather entity and the derived sensors
+    are kept, as typed arrays (8 bytes per number, 1 per probability)
+    instead of the JSON objects of the payload. Start times are UTC epochs.
+    templow is the minimum temperature of daily forecasts, NaN when unknown
+    and for hourly ones; wind_gust is only known for hourly ones (NaN
+    otherwise). Conditions are the shared strings of CONDITION_MAP.
+    """
+
+    start: array
+    temperature: array
+    templow: array
+    condition: tuple[str, ...]
+    precipitation: array
+    precipitation_probability: array
+    wind_gust: array
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Row]) -> ForecastColumns:
+        """Build the columns from rows sorted by start time."""
+        start, temperature, templow, condition, precipitation, probability, gust = (
+            list(zip(*rows)) or [()] * 7
+        )
+        return cls(
+            array("q", start),
+            array("d", temperature),
+            array("d", templow),
+            tuple(condition),
+            array("d", precipitation),
+            array("B", probability),
+            array("d", gust),
+        )
+
+    @classmethod
+    def from_dict(cls, stored: dict[str, Any]) -> ForecastColumns:
+        """Build the columns stored by as_dict."""
+        return cls(
+            array("q", stored["start"]),
+            array("d", stored["temperature"]),
+            array("d", (math.nan if value is None else value for value in stored["templow"])),
+            tuple(sys.intern(value) for value in stored["condition"]),
+            array("d", stored["precipitation"]),
+            array("B", stored["precipitation_probability"]),
+            # Las columnas guardadas antes de existir la racha no la tienen
+            array(
+                "d",
+                (
+                    math.nan if value is None else value
+                    for value in stored.get("wind_gust") or [None] * len(stored["start"])
+                ),
+            ),
+        )
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self.start)
+
+    def rows(self) -> Iterator[Row]:
+        """Yield the entries as rows."""
+        return zip(
+            self.start,
+            self.temperature,
+            self.templow,
+            self.condition,
+            self.precipitation,
+            self.precipitation_probability,
+            self.wind_gust,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the columns as JSON serializable lists."""
+        return {
+            "start": self.start.tolist(),
+            "temperature": self.temperature.tolist(),
+            # JSON no admite NaN
+            "templow": [None if math.isnan(value) else value for value in self.templow],
+            "condition": list(self.condition),
+            "precipitation": self.precipitation.tolist(),
+            "precipitation_probability": self.precipitation_probability.tolist(),
+            "wind_gust": [None if math.isnan(value) else value for value in self.wind_gust],
+        }
+
+
+def decode_daily(payload: dict[str, Any] | None) -> ForecastColumns:
+    """Decode a daily forecast payload.
+
+    The maximum temperature is taken from the daytime forecast or the day
+    itself, the minimum from the nighttime forecast or the day. Days without
+    a daytime or nighttime forecast, a start time or a maximum temperature
+    are skipped.
+    """
+    rows: list[Row] = []
+    skipped = 0
+    for day in _items(payload, "forecastDays"):
+        daytime = _object(day.get("daytimeForecast"))
+        nighttime = _object(day.get("nighttimeForecast"))
+        if not daytime and not nighttime:
+            skipped += 1
+            continue
+        max_temperature = _first_number(
+            daytime, ("temperature", "maxTemperature"), day, "maxTemperature"
+        )
+        start = _epoch(_object(day.get("interval")).get("startTime"))
+        if max_temperature is None or start is None:
+            skipped += 1
+            continue
+        min_temperature = _first_number(
+            nighttime, ("temperature", "minTemperature"), day, "minTemperature"
+        )
+        rows.append(
+            (
+                start,
+                max_temperature,
+                _nan_if_none(min_temperature),
+                _condition(daytime, True),
+                *_precipitation(daytime),
+                math.nan,
+            )
+        )
+    if skipped:
+        _LOGGER.warning("Skipped %s days of the daily forecast with missing data", skipped)
+    return ForecastColumns.from_rows(sorted(rows))
+
+
+def decode_hourly(payload: dict[str, Any] | None) -> ForecastColumns:
+    """Decode an hourly forecast payload or page.
+
+    Hours without a start time or a temperature are skipped.
+    """
+    rows: list[Row] = []
+    skipped = 0
+    for hour in _items(payload, "forecastHours"):
+        temperature = _number(_object(hour.get("temperature")).get("degrees"))
+        start = _epoch(_object(hour.get("interval")).get("startTime"))
+        if temperature is None or start is None:
+            skipped += 1
+            continue
+        rows.append(
+            (
+                start,
+                temperature,
+                math.nan,
+                _condition(hour, hour.get("isDaytime", True)),
+                *_precipitation(hour),
+                _nan_if_none(
+                    _number(_object(_object(hour.get("wind")).get("gust")).get("value"))
+                ),
+            )
+        )
+    if skipped:
+        _LOGGER.warning("Skipped %s hours of the hourly forecast with missing data", skipped)
+    # La API devuelve las horas en orden; solo se reordena si no es así
+    if any(a[0] > b[0] for a, b in zip(rows, rows[1:])):
+        rows.sort()
+    return ForecastColumns.from_rows(rows)
+
+
+def merge_hourly(
+    pages: list[ForecastColumns], previous: ForecastColumns | None = None
+) -> ForecastColumns:
+    """Merge decoded hourly forecast pages into one forecast.
+
+    Hours are keyed by their start time, so overlapping pages never repeat
+    an hour. Only pass previous while pages are missing: its hours after the
+    last new hour are kept, which keeps the horizon complete while the
+    remaining pages load.
+    """
+    if len(pages) == 1 and not previous:
+        return pages[0]
+    rows = {row[0]: row for page in pages for row in page.rows()}
+    if previous and rows:
+        last = max(rows)
+        rows.update((row[0], row) for row in previous.rows() if row[0] > last)
+    return ForecastColumns.from_rows(rows[start] for start in sorted(rows))
+
+
+def daily_from_hourly(hourly: ForecastColumns, time_zone: tzinfo) -> ForecastColumns:
+    """Build a daily forecast from the hours of each local date.
+
+    Each day starts at local midnight and has the highest and lowest
+    temperature of its hours, their most frequent condition (clear nights
+    count as sunny), the summed precipitation and the highest precipitation
+    probability. The first day is the date of the first hour, however few
+    hours are left of it; a last day the forecast does not reach the end of
+    is dropped, as its extremes would be those of a few hours.
+    """
+    start = hourly.start
+    if not start:
+        return ForecastColumns.from_rows(())
+    rows: list[Row] = []
+    day = datetime.fromtimestamp(start[0], time_zone).date()
+    first = 0
+    while first < len(start):
+        # Medianoche local del día siguiente, con el desfase de esa fecha
+        next_day = day + timedelta(days=1)
+        midnight = datetime.combine(next_day, time(), time_zone).timestamp()
+        last = bisect_left(start, midnight, first)
+        if last == len(start) and rows and start[-1] + 3600 < midnight:
+            break
+        if last > first:
+            hours = slice(first, last)
+            conditions = Counter(
+                "sunny" if condition == "clear-night" else condition
+                for condition in hourly.condition[hours]
+            )
+            rows.append(
+                (
+                    int(datetime.combine(day, time(), time_zone).timestamp()),
+                    max(hourly.temperature[hours]),
+                    min(hourly.temperature[hours]),
+                    conditions.most_common(1)[0][0],
+                    round(math.fsum(hourly.precipitation[hours]), 2),
+                    max(hourly.precipitation_probability[hours]),
+                    math.nan,
+                )
+            )
+        day, first = next_day, last
+    return ForecastColumns.from_rows(rows)
+
+
+def _items(payload: dict[str, Any] | None, key: str) -> Iterator[dict[str, Any]]:
+    """Yield the objects of a list in the payload."""
+    items = payload.get(key) if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        return
+    for item in items:
+        if isinstance(item, dict):
+            yield item
+
+
+def _object(value: Any) -> dict[str, Any]:
+    """Return value if it is an object, or an empty one."""
+    return value if isinstance(value, dict) else {}
+
+
+def _number(value: Any) -> float | None:
+    """Return value if it is a number."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _nan_if_none(value: float | None) -> float:
+    """Return value, or NaN for a missing number."""
+    return math.nan if value is None else value
+
+
+def _first_number(
+    period: dict[str, Any], period_keys: tuple[str, ...], day: dict[str, Any], day_key: str
+) -> float | None:
+    """Return the first temperature found in the period or the day."""
+    for key in period_keys:
+        if (degrees := _number(_object(period.get(key)).get("degrees"))) is not None:
+            return degrees
+    return _number(_object(day.get(day_key)).get("degrees"))
+
+
+def _epoch(value: Any) -> int | None:
+    """Parse a timestamp of the API into a UTC epoch, UTC when it has no offset."""
+    if not isinstance(value, str) or (parsed := dt_util.parse_datetime(value)) is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.UTC)
+    return int(parsed.timestamp())
+
+
+def _precipitation(period: dict[str, Any]) -> tuple[float, int]:
+    """Return the precipitation amount and probability of a period."""
+    precipitation = _object(period.get("precipitation"))
+    probability = _number(_object(precipitation.get("probability")).get("percent")) or 0
+    return (
+        _number(_object(precipitation.get("qpf")).get("quantity")) or 0.0,
+        min(max(round(probability), 0), 100),
+    )
+
+
+def _condition(period: dict[str, Any], is_daytime: Any) -> str:
+    """Return the Home Assistant condition of a period."""
+    weather_type = _object(period.get("weatherCondition")).get("type", "CLEAR")
+    condition = CONDITION_MAP.get(weather_type, "sunny")
+    # Si es despejado y es de noche, cambiar a clear-night
+    if condition == "sunny" and not is_daytime:
+        return "clear-night"
+    return condition
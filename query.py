@@ -0,0 +1,90 @@
+"""Time-window queries over the stored forecasts of Google Maps Weather."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, tzinfo
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .models import ForecastColumns
+
+# Atributo de la respuesta -> columna del pronóstico
+QUERY_ATTRIBUTES = {
+    "temperature": "temperature",
+    "templow": "templow",
+    "precipitation": "precipitation",
+    "precipitation_probability": "precipitation_probability",
+    "wind_gust_speed": "wind_gust",
+}
+
+
+def query_forecast(
+    columns: ForecastColumns,
+    duration: int,
+    time_zone: tzinfo,
+    start: datetime,
+    end: datetime | None = None,
+    attribute: str = "temperature",
+    above: float | None = None,
+    below: float | None = None,
+    limit: int | None = None,
+) -> dict[str, Any]:
+    """Return the forecast entries of a time window and their statistics.
+
+    Entries last duration seconds and are selected when they overlap the
+    window from start to end (the end of the forecast when None), so the
+    entry in progress at start is included. With above or below only the
+    entries whose attribute is strictly above or below them are kept. The
+    statistics of the attribute cover every selected entry with a value;
+    at most limit entries are returned, the earliest first.
+    """
+    starts = columns.start
+    # El pronóstico está ordenado: los extremos de la ventana son dos búsquedas
+    first = bisect_right(starts, start.timestamp() - duration)
+    last = len(starts) if end is None else bisect_left(starts, end.timestamp())
+    values = getattr(columns, QUERY_ATTRIBUTES[attribute])
+    selected: range | list[int] = range(first, max(first, last))
+    if above is not None or below is not None:
+        selected = [
+            index
+            for index in selected
+            # NaN: valor desconocido, nunca cumple el filtro
+            if (value := values[index]) == value
+            and (above is None or value > above)
+            and (below is None or value < below)
+        ]
+    known = [value for index in selected if (value := values[index]) == value]
+
+    return {
+        "count": len(selected),
+        "statistics": {
+            "attribute": attribute,
+            "min": min(known, default=None),
+            "max": max(known, default=None),
+            "mean": round(sum(known) / len(known), 2) if known else None,
+            "sum": round(sum(known), 2) if known else None,
+        },
+        "forecast": [
+            _entry(columns, index, time_zone) for index in selected[:limit]
+        ],
+    }
+
+
+def _entry(columns: ForecastColumns, index: int, time_zone: tzinfo) -> dict[str, Any]:
+    """Return one forecast entry with the keys of the weather forecasts."""
+    entry: dict[str, Any] = {
+        "datetime": dt_util.utc_from_timestamp(columns.start[index])
+        .astimezone(time_zone)
+        .isoformat(),
+        "condition": columns.condition[index],
+        "temperature": columns.temperature[index],
+        "precipitation": columns.precipitation[index],
+        "precipitation_probability": columns.precipitation_probability[index],
+    }
+    # Los campos que este tipo de pronóstico no tiene se omiten
+    if (templow := columns.templow[index]) == templow:
+        entry["templow"] = templow
+    if (wind_gust := columns.wind_gust[index]) == wind_gust:
+        entry["wind_gust_speed"] = wind_gust
+    return entry
@@ -0,0 +1,198 @@
+"""Retry and circuit breaker helpers for the Google Maps Weather API client."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+import logging
+import random
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    API_RETRY_BASE_DELAY,
+    API_RETRY_MAX_DELAY,
+    BREAKER_CLOSED,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN,
+    BREAKER_MAX_RESET_TIMEOUT,
+    BREAKER_OPEN,
+    BREAKER_RESET_TIMEOUT,
+    DATA_BREAKERS,
+    DOMAIN,
+)
+from .usage import key_id
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+    def __init__(self, retry_at: float) -> None:
+        """Initialize the error."""
+        self.retry_at = retry_at
+        super().__init__(
+            "API circuit breaker open until "
+            f"{dt_util.as_local(dt_util.utc_from_timestamp(retry_at)):%H:%M:%S}"
+        )
+
+
+class CircuitBreaker:
+    """Circuit breaker shared by every request made with one API key.
+
+    After BREAKER_FAILURE_THRESHOLD consecutive transient failures the
+    breaker opens and requests fail at once without reaching the API. Once
+    the reset timeout is over a single probe request is let through (half
+    open): success closes the breaker, failure opens it again for twice as
+    long. A Retry-After longer than the client is willing to wait opens the
+    breaker until that time.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the breaker, closed."""
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: str | None = None
+        self._retry_at = 0.0
+        self._reset_timeout = BREAKER_RESET_TIMEOUT
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def retry_at(self) -> datetime | None:
+        """Return when requests will be let through again."""
+        if self.state != BREAKER_OPEN:
+            return None
+        return dt_util.utc_from_timestamp(self._retry_at)
+
+    @callback
+    def async_before_request(self) -> bool:
+        """Raise CircuitOpenError unless a request may be sent now.
+
+        Return whether the request is the probe of the half open breaker.
+        """
+        if self.state == BREAKER_CLOSED:
+            return False
+        if self.state == BREAKER_OPEN and dt_util.utcnow().timestamp() >= self._retry_at:
+            # Se deja pasar una única petición de prueba
+            self._set_state(BREAKER_HALF_OPEN)
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(self._retry_at)
+
+    @callback
+    def async_record_success(self) -> None:
+        """Record a request that reached the API."""
+        self.failures = 0
+        self._reset_timeout = BREAKER_RESET_TIMEOUT
+        if self.state != BREAKER_CLOSED:
+            _LOGGER.info("Google Maps Weather API available again, circuit closed")
+            self._set_state(BREAKER_CLOSED)
+
+    @callback
+    def async_record_failure(self, error: str, retry_after: float | None = None) -> None:
+        """Record a transient failure, opening the breaker when needed."""
+        self.failures += 1
+        self.last_error = error
+        if retry_after is not None and retry_after > API_RETRY_MAX_DELAY:
+            self._open(retry_after)
+        elif self.state == BREAKER_HALF_OPEN:
+            self._reset_timeout = min(self._reset_timeout * 2, BREAKER_MAX_RESET_TIMEOUT)
+            self._open(self._reset_timeout)
+        elif self.failures >= BREAKER_FAILURE_THRESHOLD:
+            self._open(self._reset_timeout)
+
+    @callback
+    def async_release_probe(self) -> None:
+        """Reopen the breaker after a probe that ended without a result.
+
+        A cancelled probe, or one failing with an error that is neither a
+        success nor a transient failure, would otherwise leave the breaker
+        half open, rejecting every request, for good.
+        """
+        if self.state != BREAKER_HALF_OPEN:
+            return
+        self._retry_at = dt_util.utcnow().timestamp() + self._reset_timeout
+        self._set_state(BREAKER_OPEN)
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call listener when the state of the breaker changes."""
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the breaker."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected_requests": self.rejected,
+            "retry_at": retry_at.isoformat() if (retry_at := self.retry_at) else None,
+            "last_error": self.last_error,
+        }
+
+    def _open(self, seconds: float) -> None:
+        """Stop requests for the given number of seconds."""
+        self._retry_at = max(self._retry_at, dt_util.utcnow().timestamp() + seconds)
+        if self.state != BREAKER_OPEN:
+            self.times_opened += 1
+            _LOGGER.warning(
+                "Google Maps Weather API failing (%s), pausing requests for %s s",
+                self.last_error,
+                round(seconds),
+            )
+        self._set_state(BREAKER_OPEN)
+
+    def _set_state(self, state: str) -> None:
+        """Change the state and notify the listeners."""
+        if state == self.state:
+            return
+        self.state = state
+        for listener in list(self._listeners):
+            listener()
+
+
+@callback
+def async_get_breaker(hass: HomeAssistant, api_key: str) -> CircuitBreaker:
+    """Return the circuit breaker of an API key, shared by every entry."""
+    breakers: dict[str, CircuitBreaker] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        DATA_BREAKERS, {}
+    )
+    return breakers.setdefault(key_id(api_key), CircuitBreaker())
+
+
+def retry_delay(attempt: int, retry_after: float | None) -> float | None:
+    """Return the seconds to wait before retrying, None to give up.
+
+    Honors Retry-After when the server sends it; otherwise waits a random
+    time up to an exponentially growing limit (full jitter), so locations
+    failing together do not retry together.
+    """
+    if retry_after is not None:
+        return retry_after if retry_after <= API_RETRY_MAX_DELAY else None
+    return random.uniform(0, min(API_RETRY_BASE_DELAY * 2**attempt, API_RETRY_MAX_DELAY))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the seconds of a Retry-After header (delay or HTTP date)."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dt_util.UTC)
+    return max((when - dt_util.utcnow()).total_seconds(), 0.0)
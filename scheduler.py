@@ -0,0 +1,160 @@
+"""Staggered refresh scheduler for Google Maps Weather locations."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from functools import partial
+import logging
+import random
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at, async_call_later
+
+from .const import SCHEDULER_JITTER_FRACTION, SCHEDULER_MAX_CONCURRENCY, SCHEDULER_MAX_JITTER
+from .coordinator import GoogleMapsWeatherCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """Spread the refreshes of many locations evenly over the update interval.
+
+    Location ``i`` of ``n`` is refreshed at ``start + interval * (1 + i / n)``
+    and then once per interval, with a small random jitter around its slot.
+    Refreshes run through a semaphore so bursts never exceed the configured
+    concurrency.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        interval: timedelta,
+        max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.interval = interval.total_seconds()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._coordinators: list[GoogleMapsWeatherCoordinator] = []
+        self._slots: dict[str, float] = {}
+        self._unsubs: dict[str, CALLBACK_TYPE] = {}
+        self._jobs: dict[str, HassJob] = {}
+        self._first_refresh_unsubs: list[CALLBACK_TYPE] = []
+        self._first_refresh_tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def slot_width(self) -> float:
+        """Return the seconds between two consecutive location slots."""
+        return self.interval / max(len(self._coordinators), 1)
+
+    @property
+    def max_gap(self) -> float:
+        """Return the most seconds that can pass between two consecutive slots."""
+        return self.slot_width + 2 * self._jitter_range
+
+    @property
+    def _jitter_range(self) -> float:
+        """Return how many seconds a refresh may move around its slot."""
+        return min(self.slot_width * SCHEDULER_JITTER_FRACTION, SCHEDULER_MAX_JITTER)
+
+    @callback
+    def async_add(self, coordinators: Iterable[GoogleMapsWeatherCoordinator]) -> None:
+        """Register the coordinators to schedule."""
+        self._coordinators.extend(coordinators)
+
+    async def async_refresh(self, coordinator: GoogleMapsWeatherCoordinator) -> None:
+        """Refresh one location once a concurrency slot is free."""
+        async with self._semaphore:
+            await coordinator.async_refresh()
+
+    @callback
+    def async_start(self) -> None:
+        """Schedule the periodic refresh of every location."""
+        start = self.hass.loop.time()
+        count = len(self._coordinators)
+        for index, coordinator in enumerate(self._coordinators):
+            # El primer refresco periódico ocurre un intervalo completo después
+            # del inicial, desplazado según la posición de la ubicación
+            self._slots[coordinator.location_id] = (
+                start + self.interval * (1 + index / count)
+            )
+            self._jobs[coordinator.location_id] = HassJob(
+                partial(self._async_handle_slot, coordinator),
+                f"Google Maps Weather refresh {coordinator.location_name}",
+                cancel_on_shutdown=True,
+            )
+            self._schedule(coordinator)
+
+        _LOGGER.debug(
+            "Scheduled %s locations every %s s (one every %.0f s)",
+            count,
+            self.interval,
+            self.slot_width,
+        )
+
+    @callback
+    def async_schedule_first_refresh(self, max_delay: float) -> None:
+        """Refresh every location once, in the background.
+
+        Locations without data refresh right away. The others already show
+        their last known state and wait a random delay of up to max_delay
+        seconds, so entries starting together do not call the API at once.
+        """
+        for coordinator in self._coordinators:
+            if coordinator.data is None:
+                task = self.hass.async_create_task(
+                    self.async_refresh(coordinator),
+                    f"Google Maps Weather first refresh {coordinator.location_name}",
+                )
+                # Se guarda para cancelarlo si la entrada se descarga antes
+                self._first_refresh_tasks.add(task)
+                task.add_done_callback(self._first_refresh_tasks.discard)
+                continue
+            self._first_refresh_unsubs.append(
+                async_call_later(
+                    self.hass,
+                    random.uniform(0, max_delay),
+                    HassJob(
+                        partial(self._async_handle_first_refresh, coordinator),
+                        f"Google Maps Weather first refresh {coordinator.location_name}",
+                        cancel_on_shutdown=True,
+                    ),
+                )
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel every pending refresh, and the first refreshes still running."""
+        for unsub in (*self._unsubs.values(), *self._first_refresh_unsubs):
+            unsub()
+        for task in self._first_refresh_tasks:
+            task.cancel()
+        self._unsubs.clear()
+        self._first_refresh_unsubs.clear()
+        self._first_refresh_tasks.clear()
+
+    @callback
+    def _schedule(self, coordinator: GoogleMapsWeatherCoordinator) -> None:
+        """Schedule the next slot of a location."""
+        when = self._slots[coordinator.location_id] + random.uniform(
+            -self._jitter_range, self._jitter_range
+        )
+        self._unsubs[coordinator.location_id] = async_call_at(
+            self.hass, self._jobs[coordinator.location_id], when
+        )
+
+    async def _async_handle_first_refresh(
+        self, coordinator: GoogleMapsWeatherCoordinator, _now: datetime
+    ) -> None:
+        """Run the first refresh of a location."""
+        await self.async_refresh(coordinator)
+
+    async def _async_handle_slot(
+        self, coordinator: GoogleMapsWeatherCoordinator, _now: datetime
+    ) -> None:
+        """Refresh a location and schedule its next slot."""
+        # Anclar al slot (no a la hora real) para que el desfase no se acumule
+        self._slots[coordinator.location_id] += self.interval
+        self._schedule(coordinator)
+        await self.async_refresh(coordinator)
@@ -1,252 +1,753 @@
 """Sensor platform for Google Maps Weather integration."""
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
 import logging
+from time import monotonic
 from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    EntityCategory,
     PERCENTAGE,
-    UnitOfLength,
-    UnitOfPrecipitationDepth,
-    UnitOfSpeed,
+    UnitOfInformation,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.event import async_call_later, async_track_utc_time_change
 
-from .const import CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL, DOMAIN
+from .const import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    CONF_API_KEY,
+    DERIVED_LOOKAHEAD_HOURS,
+    DERIVED_PRECIPITATION_HOURS,
+    DOMAIN,
+    ENDPOINT_CURRENT,
+    ENDPOINT_HOURLY,
+    FREE_TIER_MONTHLY_CALLS,
+    MINUTES_PER_MONTH,
+    SENSOR_CURRENT_FIELDS,
+    STATE_WRITES_SENSOR_INTERVAL,
+)
+from .coordinator import (
+    GoogleMapsWeatherCoordinator,
+    get_calls_per_fetch,
+    get_effective_intervals,
+    get_monthly_budget,
+)
+from .adaptive import CallBudget
+from .derived import DerivedMetrics
+from .entity import GoogleMapsWeatherBaseEntity, stale_attributes
+from .grid import GridCache
+from .metrics import PerformanceMetrics
+from .resilience import CircuitBreaker
+from .transport import GoogleMapsWeatherTransport
+from .usage import UsageTracker
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, kw_only=True)
+class GoogleMapsWeatherSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor reading one field of the current conditions.
+
+    data_path is the dotted path of the field in the payload, which is also
+    its key in the coordinator's flattened current conditions.
+    """
+
+    data_path: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class DerivedSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor reading one aggregate of the hourly forecast."""
+
+    value_fn: Callable[[DerivedMetrics], float | int | None]
+    state_class: SensorStateClass | None = SensorStateClass.MEASUREMENT
+
+
+@dataclass(frozen=True, kw_only=True)
+class PerformanceSensorEntityDescription(SensorEntityDescription):
+    """Describes a diagnostic sensor of the entry's performance metrics."""
+
+    value_fn: Callable[[PerformanceMetrics], float | int | None]
+    attributes_fn: Callable[[PerformanceMetrics], dict[str, Any]]
+    device_class: SensorDeviceClass | None = SensorDeviceClass.DURATION
+    state_class: SensorStateClass | None = SensorStateClass.MEASUREMENT
+    native_unit_of_measurement: str | None = UnitOfTime.MILLISECONDS
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    # Segundos mínimos entre escrituras; sin él, solo se escribe al cambiar
+    min_write_interval: float | None = None
+
+
+SENSOR_DESCRIPTIONS: tuple[GoogleMapsWeatherSensorEntityDescription, ...] = (
+    # UV Index no usa device_class porque no tiene unidad estándar
+    GoogleMapsWeatherSensorEntityDescription(
+        key="uv_index",
+        name="UV Index",
+        data_path=SENSOR_CURRENT_FIELDS["uv_index"],
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="dew_point",
+        name="Dew Point",
+        data_path=SENSOR_CURRENT_FIELDS["dew_point"],
+        native_unit_of_measurement="°C",
+        device_class=SensorDeviceClass.TEMPERATURE,
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="heat_index",
+        name="Heat Index",
+        data_path=SENSOR_CURRENT_FIELDS["heat_index"],
+        native_unit_of_measurement="°C",
+        device_class=SensorDeviceClass.TEMPERATURE,
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="wind_chill",
+        name="Wind Chill",
+        data_path=SENSOR_CURRENT_FIELDS["wind_chill"],
+        native_unit_of_measurement="°C",
+        device_class=SensorDeviceClass.TEMPERATURE,
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="wind_gust",
+        name="Wind Gust",
+        data_path=SENSOR_CURRENT_FIELDS["wind_gust"],
+        native_unit_of_measurement="km/h",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="wind_direction",
+        name="Wind Direction",
+        data_path=SENSOR_CURRENT_FIELDS["wind_direction"],
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="cloud_cover",
+        name="Cloud Cover",
+        data_path=SENSOR_CURRENT_FIELDS["cloud_cover"],
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="thunderstorm_probability",
+        name="Thunderstorm Probability",
+        data_path=SENSOR_CURRENT_FIELDS["thunderstorm_probability"],
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="precipitation_probability",
+        name="Precipitation Probability",
+        data_path=SENSOR_CURRENT_FIELDS["precipitation_probability"],
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    GoogleMapsWeatherSensorEntityDescription(
+        key="precipitation_amount",
+        name="Precipitation Amount",
+        data_path=SENSOR_CURRENT_FIELDS["precipitation_amount"],
+        native_unit_of_measurement="mm",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+DERIVED_SENSOR_DESCRIPTIONS: tuple[DerivedSensorEntityDescription, ...] = (
+    DerivedSensorEntityDescription(
+        key="precipitation_next_hours",
+        name=f"Precipitation Next {DERIVED_PRECIPITATION_HOURS} Hours",
+        icon="mdi:weather-pouring",
+        native_unit_of_measurement="mm",
+        value_fn=lambda derived: derived.precipitation_next_hours,
+    ),
+    DerivedSensorEntityDescription(
+        key="precipitation_probability_max",
+        name=f"Max Precipitation Probability Next {DERIVED_LOOKAHEAD_HOURS} Hours",
+        icon="mdi:umbrella-outline",
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda derived: derived.precipitation_probability_max,
+    ),
+    DerivedSensorEntityDescription(
+        key="wind_gust_max",
+        name=f"Max Wind Gust Next {DERIVED_LOOKAHEAD_HOURS} Hours",
+        icon="mdi:weather-windy",
+        native_unit_of_measurement="km/h",
+        value_fn=lambda derived: derived.wind_gust_max,
+    ),
+    DerivedSensorEntityDescription(
+        key="hours_until_freezing",
+        name="Hours Until Freezing",
+        icon="mdi:snowflake-thermometer",
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        value_fn=lambda derived: derived.hours_until_freezing,
+    ),
+    DerivedSensorEntityDescription(
+        key="temperature_max_today",
+        name="Temperature Max Today",
+        native_unit_of_measurement="°C",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        value_fn=lambda derived: derived.temperature_max_today,
+    ),
+    DerivedSensorEntityDescription(
+        key="temperature_min_today",
+        name="Temperature Min Today",
+        native_unit_of_measurement="°C",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        value_fn=lambda derived: derived.temperature_min_today,
+    ),
+)
+
+PERFORMANCE_SENSOR_DESCRIPTIONS: tuple[PerformanceSensorEntityDescription, ...] = (
+    PerformanceSensorEntityDescription(
+        key="api_latency",
+        name="API Latency",
+        icon="mdi:timer-outline",
+        value_fn=lambda metrics: metrics.latency_avg_ms,
+        attributes_fn=lambda metrics: {
+            endpoint: {
+                **endpoint_metrics.latency.as_dict(),
+                "status_counts": dict(endpoint_metrics.status_counts),
+            }
+            for endpoint, endpoint_metrics in metrics.endpoints.items()
+        },
+    ),
+    PerformanceSensorEntityDescription(
+        key="api_transfer_size",
+        name="API Transfer Size",
+        icon="mdi:swap-vertical",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.wire_bytes_total,
+        attributes_fn=lambda metrics: {
+            endpoint: {
+                "last_bytes": endpoint_metrics.wire_bytes_last,
+                "total_bytes": endpoint_metrics.wire_bytes_total,
+                "compression_ratio": endpoint_metrics.compression_ratio,
+            }
+            for endpoint, endpoint_metrics in metrics.endpoints.items()
+        },
+    ),
+    PerformanceSensorEntityDescription(
+        key="api_response_size",
+        name="API Response Size",
+        icon="mdi:download-network",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.response_bytes_total,
+        attributes_fn=lambda metrics: {
+            endpoint: {
+                "last_bytes": endpoint_metrics.response_bytes_last,
+                "total_bytes": endpoint_metrics.response_bytes_total,
+            }
+            for endpoint, endpoint_metrics in metrics.endpoints.items()
+        },
+    ),
+    PerformanceSensorEntityDescription(
+        key="json_decode_time",
+        name="JSON Decode Time",
+        icon="mdi:code-json",
+        value_fn=lambda metrics: metrics.json_decode_avg_ms,
+        attributes_fn=lambda metrics: {
+            endpoint: {
+                **endpoint_metrics.json_decode.as_dict(),
+                "payloads_changed": endpoint_metrics.payloads_changed,
+                "payloads_unchanged": endpoint_metrics.payloads_unchanged,
+            }
+            for endpoint, endpoint_metrics in metrics.endpoints.items()
+        },
+    ),
+    PerformanceSensorEntityDescription(
+        key="forecast_build_time",
+        name="Forecast Build Time",
+        icon="mdi:chart-timeline-variant",
+        value_fn=lambda metrics: metrics.forecast_build.avg_ms,
+        attributes_fn=lambda metrics: metrics.forecast_build.as_dict(),
+    ),
+    PerformanceSensorEntityDescription(
+        key="update_cycle_duration",
+        name="Update Cycle Duration",
+        icon="mdi:update",
+        value_fn=lambda metrics: metrics.update_cycle.avg_ms,
+        attributes_fn=lambda metrics: metrics.update_cycle.as_dict(),
+    ),
+    PerformanceSensorEntityDescription(
+        key="data_memory",
+        name="Data Memory",
+        icon="mdi:memory",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        value_fn=lambda metrics: metrics.data_memory_total,
+        attributes_fn=lambda metrics: metrics.data_memory_as_dict(),
+    ),
+    PerformanceSensorEntityDescription(
+        key="state_writes",
+        name="State Writes",
+        icon="mdi:database-edit-outline",
+        native_unit_of_measurement=None,
+        device_class=None,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.state_writes,
+        attributes_fn=lambda metrics: metrics.state_writes_as_dict(),
+        min_write_interval=STATE_WRITES_SENSOR_INTERVAL,
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Google Maps Weather sensors."""
-    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinators: dict[str, GoogleMapsWeatherCoordinator] = entry_data["coordinators"]
     
-    sensors = [
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "UV Index",
-            "uv_index",
-            "uvIndex",
-            None,
-            None,  # UV Index no usa device_class porque no tiene unidad estándar
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Dew Point",
-            "dew_point",
-            "dewPoint.degrees",
-            "°C",
-            SensorDeviceClass.TEMPERATURE,
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Heat Index",
-            "heat_index",
-            "heatIndex.degrees",
-            "°C",
-            SensorDeviceClass.TEMPERATURE,
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Wind Chill",
-            "wind_chill",
-            "windChill.degrees",
-            "°C",
-            SensorDeviceClass.TEMPERATURE,
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Wind Gust",
-            "wind_gust",
-            "wind.gust.value",
-            "km/h",
-            None,
-            SensorStateClass.MEASUREMENT,
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Wind Direction",
-            "wind_direction",
-            "wind.direction.cardinal",
-            None,
-            None,
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Cloud Cover",
-            "cloud_cover",
-            "cloudCover",
-            PERCENTAGE,
-            None,
-            SensorStateClass.MEASUREMENT,
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Thunderstorm Probability",
-            "thunderstorm_probability",
-            "thunderstormProbability",
-            PERCENTAGE,
-            None,
-            SensorStateClass.MEASUREMENT,
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Precipitation Probability",
-            "precipitation_probability",
-            "precipitation.probability.percent",
-            PERCENTAGE,
-            None,
-            SensorStateClass.MEASUREMENT,
-        ),
-        GoogleMapsWeatherSensor(
-            coordinator,
-            entry,
-            "Precipitation Amount",
-            "precipitation_amount",
-            "precipitation.qpf.quantity",
-            "mm",
-            None,
-            SensorStateClass.MEASUREMENT,
-        ),
-        APIUsageSensor(
-            coordinator,
-            entry,
-        ),
+    sensors: list[SensorEntity] = [
+        GoogleMapsWeatherSensor(coordinator, description)
+        for coordinator in coordinators.values()
+        for description in SENSOR_DESCRIPTIONS
     ]
+    sensors.extend(
+        DerivedForecastSensor(coordinator, description)
+        for coordinator in coordinators.values()
+        for description in DERIVED_SENSOR_DESCRIPTIONS
+    )
+
+    # Los sensores de uso, transporte y rendimiento son de la entrada, no de
+    # cada ubicación: se asocian al dispositivo de la primera ubicación
+    primary = next(iter(coordinators.values()))
+    sensors.extend(
+        [
+            APIUsageSensor(
+                primary,
+                entry,
+                list(coordinators.values()),
+                entry_data["budget"],
+            ),
+            APICallsSensor(
+                primary,
+                entry,
+                entry_data["usage"],
+            ),
+            TransportSensor(
+                primary,
+                entry_data["transport"],
+            ),
+            GridSensor(
+                primary,
+                entry_data["grid"],
+                list(coordinators.values()),
+            ),
+            CircuitBreakerSensor(
+                primary,
+                entry_data["breaker"],
+                entry_data["metrics"],
+            ),
+        ]
+    )
+    sensors.extend(
+        PerformanceSensor(primary, entry_data["metrics"], description)
+        for description in PERFORMANCE_SENSOR_DESCRIPTIONS
+    )
     
-    async_add_entities(sensors, True)
+    # Sin update_before_add: los coordinadores ya tienen datos y un refresco
+    # extra por entidad solo gastaría llamadas a la API
+    async_add_entities(sensors)
 
 
-class GoogleMapsWeatherSensor(CoordinatorEntity, SensorEntity):
+class GoogleMapsWeatherSensor(GoogleMapsWeatherBaseEntity, SensorEntity):
     """Representation of a Google Maps Weather sensor."""
 
+    entity_description: GoogleMapsWeatherSensorEntityDescription
+
     def __init__(
         self,
-        coordinator,
-        entry: ConfigEntry,
-        name: str,
-        sensor_id: str,
-        data_path: str,
-        unit: str | None,
-        device_class: SensorDeviceClass | None = None,
-        state_class: SensorStateClass | None = None,
+        coordinator: GoogleMapsWeatherCoordinator,
+        description: GoogleMapsWeatherSensorEntityDescription,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._attr_name = name
-        self._attr_unique_id = f"{entry.entry_id}_{sensor_id}"
-        self._data_path = data_path
-        self._attr_native_unit_of_measurement = unit
-        self._attr_device_class = device_class
-        self._attr_state_class = state_class
-        self._attr_has_entity_name = True
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-            "name": "Google Maps Weather",
-            "manufacturer": "Google",
-            "model": "Weather API",
-        }
+        # Los sensores solo leen las condiciones actuales
+        super().__init__(coordinator, description.key, ENDPOINT_CURRENT)
+        self.entity_description = description
 
     @property
     def native_value(self) -> Any:
         """Return the state of the sensor."""
-        if not self.coordinator.data or "current" not in self.coordinator.data:
+        return self.coordinator.current.get(self.entity_description.data_path)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Mark the value as stale when the last request failed."""
+        return stale_attributes(self.coordinator, ENDPOINT_CURRENT)
+
+
+class DerivedForecastSensor(GoogleMapsWeatherBaseEntity, SensorEntity):
+    """Sensor exposing an aggregate of the hourly forecast."""
+
+    entity_description: DerivedSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: GoogleMapsWeatherCoordinator,
+        description: DerivedSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, description.key, ENDPOINT_HOURLY)
+        self.entity_description = description
+
+    async def async_added_to_hass(self) -> None:
+        """Move the windows forward every time an hour starts."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_utc_time_change(
+                self.hass, self._async_hour_started, minute=0, second=0
+            )
+        )
+
+    @callback
+    def _async_hour_started(self, now: datetime) -> None:
+        """Update the state for the new hour if it changed."""
+        self._handle_coordinator_update()
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the aggregate for the hour in progress."""
+        if (derived := self.coordinator.derived) is None:
             return None
-        
-        # Navegar por el path de datos (ej: "wind.gust.value")
-        data = self.coordinator.data["current"]
-        keys = self._data_path.split(".")
-        
-        for key in keys:
-            if isinstance(data, dict) and key in data:
-                data = data[key]
-            else:
-                return None
-        
-        return data
+        return self.entity_description.value_fn(derived)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Mark the value as stale when the last request failed."""
+        return stale_attributes(self.coordinator, ENDPOINT_HOURLY)
 
 
-class APIUsageSensor(CoordinatorEntity, SensorEntity):
+class APIUsageSensor(GoogleMapsWeatherBaseEntity, SensorEntity):
     """Sensor to monitor API usage."""
 
     def __init__(
         self,
-        coordinator,
+        coordinator: GoogleMapsWeatherCoordinator,
         entry: ConfigEntry,
+        coordinators: list[GoogleMapsWeatherCoordinator],
+        budget: CallBudget | None,
     ) -> None:
         """Initialize the API usage sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, "api_usage")
         self._attr_name = "API Usage Estimate"
-        self._attr_unique_id = f"{entry.entry_id}_api_usage"
         self._attr_native_unit_of_measurement = "calls/month"
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_icon = "mdi:api"
-        self._attr_has_entity_name = True
         self._entry = entry
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-            "name": "Google Maps Weather",
-            "manufacturer": "Google",
-            "model": "Weather API",
-        }
+        self._coordinators = coordinators
+        self._location_count = len(coordinators)
+        self._budget = budget
 
     @property
     def native_value(self) -> int:
         """Return estimated API calls per month."""
-        update_interval = self._entry.data.get(
-            CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
-        )
-        # Calcular llamadas estimadas por mes
-        # 3 llamadas por actualización (current + daily + hourly)
-        # 3 * (60 minutos * 24 horas * 30 días) / intervalo
-        return int(3 * (60 * 24 * 30) / update_interval)
+        return self._estimated_calls()
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return additional attributes."""
-        update_interval = self._entry.data.get(
-            CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
-        )
-        # 3 llamadas por actualización (current + daily + hourly)
-        estimated_calls = int(3 * (60 * 24 * 30) / update_interval)
+        intervals = get_effective_intervals(self._entry)
+        calls_by_endpoint = self._monthly_calls_by_endpoint()
+        estimated_calls = self._estimated_calls()
         
         # Determinar estado según el límite
-        if estimated_calls <= 1000:
+        if estimated_calls <= FREE_TIER_MONTHLY_CALLS:
             status = "✓ Dentro del límite gratuito"
-            percentage = (estimated_calls / 1000) * 100
+            percentage = (estimated_calls / FREE_TIER_MONTHLY_CALLS) * 100
         else:
             status = "⚠️ Sobrepasa límite gratuito"
             percentage = 100
             
-        return {
-            "update_interval_minutes": update_interval,
-            "update_interval_display": f"{update_interval} minutos",
+        attributes: dict[str, Any] = {
+            "update_interval_minutes": min(intervals.values()),
+            "update_interval_display": ", ".join(
+                f"{endpoint}: {interval} minutos"
+                for endpoint, interval in intervals.items()
+            ),
+            "endpoint_intervals_minutes": intervals,
+            "monthly_calls_by_endpoint": calls_by_endpoint,
             "estimated_monthly_calls": estimated_calls,
-            "calls_per_update": 3,
-            "free_tier_limit": 1000,
+            "locations": self._location_count,
+            "free_tier_limit": FREE_TIER_MONTHLY_CALLS,
             "usage_percentage": round(percentage, 1),
             "status": status,
             "calls_per_day": round(estimated_calls / 30, 1),
-            "within_free_tier": estimated_calls <= 1000,
+            "within_free_tier": estimated_calls <= FREE_TIER_MONTHLY_CALLS,
+            "polling_mode": "adaptive" if self._budget else "fixed",
+        }
+        if self._budget is not None:
+            attributes.update(self._budget.as_dict())
+            attributes["conditions"] = {
+                coordinator.location_name: coordinator.conditions
+                for coordinator in self._coordinators
+            }
+        return attributes
+
+    def _estimated_calls(self) -> int:
+        """Return the estimated calls per month."""
+        # En modo adaptativo el presupuesto es el máximo mensual
+        if self._budget is not None:
+            return self._budget.monthly_calls
+        # Calcular llamadas estimadas por mes a partir del intervalo real
+        # de cada endpoint: ubicaciones * (60 minutos * 24 horas * 30 días) / intervalo
+        return sum(self._monthly_calls_by_endpoint().values())
+
+    def _monthly_calls_by_endpoint(self) -> dict[str, int]:
+        """Return the estimated monthly calls of each endpoint."""
+        intervals = get_effective_intervals(self._entry)
+        calls_per_fetch = get_calls_per_fetch(self._entry)
+        return {
+            endpoint: int(
+                self._location_count
+                * calls_per_fetch[endpoint]
+                * MINUTES_PER_MONTH
+                / interval
+            )
+            for endpoint, interval in intervals.items()
+        }
+
+
+class APICallsSensor(GoogleMapsWeatherBaseEntity, SensorEntity):
+    """Sensor counting the calls really made to the API this month."""
+
+    def __init__(
+        self,
+        coordinator: GoogleMapsWeatherCoordinator,
+        entry: ConfigEntry,
+        usage: UsageTracker,
+    ) -> None:
+        """Initialize the API calls sensor."""
+        super().__init__(coordinator, "api_calls")
+        self._attr_name = "API Calls This Month"
+        self._attr_native_unit_of_measurement = "calls"
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_icon = "mdi:counter"
+        self._api_key = entry.data[CONF_API_KEY]
+        # Sin límite fijado el porcentaje se calcula sobre el tier gratuito
+        self._budget = get_monthly_budget(entry)
+        self._usage = usage
+
+    async def async_added_to_hass(self) -> None:
+        """Update the sensor after every call made with the key."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._usage.async_add_listener(self._handle_coordinator_update)
+        )
+
+    @property
+    def native_value(self) -> int:
+        """Return the calls made with the API key this month."""
+        return self._usage.total(self._api_key)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the calls by endpoint and against the budget."""
+        total = self._usage.total(self._api_key)
+        return {
+            "month": self._usage.month,
+            "calls_by_endpoint": self._usage.calls(self._api_key),
+            "monthly_budget": self._budget,
+            "budget_percentage": round(
+                total / (self._budget or FREE_TIER_MONTHLY_CALLS) * 100, 1
+            ),
+            "previous_month_calls": self._usage.previous_month_total(self._api_key),
+        }
+
+
+class TransportSensor(GoogleMapsWeatherBaseEntity, SensorEntity):
+    """Diagnostic sensor exposing the shared HTTP transport statistics."""
+
+    def __init__(
+        self,
+        coordinator: GoogleMapsWeatherCoordinator,
+        transport: GoogleMapsWeatherTransport,
+    ) -> None:
+        """Initialize the transport sensor."""
+        super().__init__(coordinator, "http_connections")
+        self._attr_name = "HTTP Connections"
+        self._attr_native_unit_of_measurement = "connections"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_icon = "mdi:lan-connect"
+        self._transport = transport
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of open sockets in the shared pool."""
+        return self._transport.open_connections
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return DNS, TLS and connection reuse statistics."""
+        # Estadísticas del pool compartido (todas las entradas ven las mismas)
+        return self._transport.as_dict()
+
+
+class GridSensor(GoogleMapsWeatherBaseEntity, SensorEntity):
+    """Diagnostic sensor exposing how often nearby locations share a fetch."""
+
+    def __init__(
+        self,
+        coordinator: GoogleMapsWeatherCoordinator,
+        grid: GridCache,
+        coordinators: list[GoogleMapsWeatherCoordinator],
+    ) -> None:
+        """Initialize the grid sensor."""
+        super().__init__(coordinator, "grid_hit_rate")
+        self._attr_name = "Grid Hit Rate"
+        self._attr_native_unit_of_measurement = PERCENTAGE
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_icon = "mdi:grid"
+        self._grid = grid
+        self._coordinators = coordinators
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the share of payloads taken from another location's fetch."""
+        return self._grid.as_dict(self._cells())["hit_rate"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the fetches and hits of each cell of the entry's locations."""
+        # Las celdas pueden tener ubicaciones de otras entradas
+        return self._grid.as_dict(self._cells())["cells"]
+
+    def _cells(self) -> list[str]:
+        """Return the grid cells of the entry's locations."""
+        return [coordinator.cell for coordinator in self._coordinators]
+
+
+class CircuitBreakerSensor(GoogleMapsWeatherBaseEntity, SensorEntity):
+    """Diagnostic sensor exposing the circuit breaker of the API key."""
+
+    def __init__(
+        self,
+        coordinator: GoogleMapsWeatherCoordinator,
+        breaker: CircuitBreaker,
+        metrics: PerformanceMetrics,
+    ) -> None:
+        """Initialize the circuit breaker sensor."""
+        super().__init__(coordinator, "circuit_breaker")
+        self._attr_name = "API Circuit Breaker"
+        self._attr_device_class = SensorDeviceClass.ENUM
+        self._attr_options = [BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN]
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_icon = "mdi:electric-switch"
+        self._breaker = breaker
+        self._metrics = metrics
+
+    async def async_added_to_hass(self) -> None:
+        """Update the sensor when the breaker opens or closes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._breaker.async_add_listener(self._handle_coordinator_update)
+        )
+
+    @property
+    def available(self) -> bool:
+        """Stay available while the API is failing, when it matters most."""
+        return True
+
+    @property
+    def native_value(self) -> str:
+        """Return the state of the breaker."""
+        return self._breaker.state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the breaker counters and the retries of this entry."""
+        return {
+            **self._breaker.as_dict(),
+            "retries": {
+                endpoint: metrics.retries
+                for endpoint, metrics in self._metrics.endpoints.items()
+            },
         }
+
+
+class PerformanceSensor(GoogleMapsWeatherBaseEntity, SensorEntity):
+    """Diagnostic sensor exposing one of the entry's performance metrics."""
+
+    entity_description: PerformanceSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: GoogleMapsWeatherCoordinator,
+        metrics: PerformanceMetrics,
+        description: PerformanceSensorEntityDescription,
+    ) -> None:
+        """Initialize the performance sensor."""
+        super().__init__(coordinator, description.key)
+        self.entity_description = description
+        self._metrics = metrics
+        self._last_write: float | None = None
+        self._unsub_write: CALLBACK_TYPE | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Cancel the pending write when the sensor is removed."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._async_cancel_write)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state, at most once per min_write_interval when set.
+
+        The state writes metric changes on every update, and would change
+        with the writes of its own sensor too: those are not counted. An
+        update inside the interval is written when the interval ends.
+        """
+        if (interval := self.entity_description.min_write_interval) is None:
+            super()._handle_coordinator_update()
+            return
+        if self._unsub_write is not None:
+            # La escritura pendiente ya recogerá esta actualización
+            return
+        now = monotonic()
+        if self._last_write is not None and (
+            wait := interval - (now - self._last_write)
+        ) > 0:
+            self._unsub_write = async_call_later(self.hass, wait, self._async_write_pending)
+            return
+        self._last_write = now
+        self.async_write_ha_state()
+
+    @callback
+    def _async_write_pending(self, _now: datetime) -> None:
+        """Write the updates received during the last interval."""
+        self._unsub_write = None
+        self._last_write = monotonic()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_write(self) -> None:
+        """Cancel the pending write."""
+        if self._unsub_write is not None:
+            self._unsub_write()
+            self._unsub_write = None
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the aggregated value of the metric."""
+        return self.entity_description.value_fn(self._metrics)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the per-endpoint breakdown of the metric."""
+        return self.entity_description.attributes_fn(self._metrics)
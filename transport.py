@@ -0,0 +1,390 @@
+"""Shared HTTP transport for Google Maps Weather."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from functools import partial
+import logging
+from time import monotonic
+from types import SimpleNamespace
+from typing import Any, TypeVar
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util import ssl as ssl_util
+
+from .const import (
+    DATA_TRANSPORT,
+    DOMAIN,
+    TRANSPORT_CONNECTION_LIMIT,
+    TRANSPORT_DNS_CACHE_TTL,
+    TRANSPORT_DRAIN_TIMEOUT,
+    TRANSPORT_KEEPALIVE_TIMEOUT,
+    TRANSPORT_LIMIT_PER_HOST,
+    TRANSPORT_MAX_KEEPALIVE_TIMEOUT,
+    TRANSPORT_REQUEST_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class TransportStats:
+    """Counters collected from aiohttp trace hooks."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.requests = 0
+        self.in_flight = 0
+        self.dns_lookups = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+        self.dns_time_last_ms: float | None = None
+        self.dns_time_total_ms = 0.0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.connect_time_last_ms: float | None = None
+        self.connect_time_total_ms = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters as a plain dict."""
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "dns_lookups": self.dns_lookups,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+            "dns_time_last_ms": _round(self.dns_time_last_ms),
+            "dns_time_avg_ms": _avg(self.dns_time_total_ms, self.dns_lookups),
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            # Incluye el handshake TCP + TLS de cada conexión nueva
+            "connect_time_last_ms": _round(self.connect_time_last_ms),
+            "connect_time_avg_ms": _avg(
+                self.connect_time_total_ms, self.connections_created
+            ),
+        }
+
+
+class RequestCoalescer:
+    """Identical requests in flight, shared by every config entry.
+
+    A caller sending a request that is already in flight waits for its
+    outcome (response or error) instead of sending it again. The request
+    runs in its own task, so a caller that is cancelled does not cancel it
+    for the others.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the coalescer."""
+        self.hass = hass
+        self.coalesced = 0
+        self._in_flight: dict[str, asyncio.Task[Any]] = {}
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether a request is in flight."""
+        return key in self._in_flight
+
+    async def async_run(self, key: str, request: Callable[[], Awaitable[_T]]) -> _T:
+        """Return the outcome of the request, joining it if already in flight."""
+        if (task := self._in_flight.get(key)) is not None:
+            self.coalesced += 1
+        else:
+            task = self._in_flight[key] = self.hass.async_create_task(
+                request(), f"{DOMAIN} request {key}"
+            )
+            task.add_done_callback(partial(self._async_request_done, key))
+        return await asyncio.shield(task)
+
+    @callback
+    def _async_request_done(self, key: str, task: asyncio.Task[Any]) -> None:
+        """Forget a finished request."""
+        self._in_flight.pop(key, None)
+        # Si todos los que esperaban se cancelaron, nadie recoge el error
+        if not task.cancelled():
+            task.exception()
+
+
+class TrackedResponse(aiohttp.ClientResponse):
+    """Response that tells the transport when it stops using its connection.
+
+    aiohttp's on_request_end trace fires as soon as the headers arrive; the
+    body is read afterwards, until the response is released or closed.
+    """
+
+    on_release: Callable[[], None] | None = None
+
+    def release(self) -> Any:
+        """Release the connection and end the request."""
+        self._async_released()
+        return super().release()
+
+    def close(self) -> None:
+        """Close the connection and end the request."""
+        self._async_released()
+        super().close()
+
+    def _async_released(self) -> None:
+        """Call on_release only once."""
+        if (on_release := self.on_release) is not None:
+            self.on_release = None
+            on_release()
+
+
+class GoogleMapsWeatherTransport:
+    """Pooled aiohttp session shared by every config entry of the integration."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the transport."""
+        self.hass = hass
+        self.stats = TransportStats()
+        self.coalescer = RequestCoalescer(hass)
+        # Entrada -> mayor hueco entre dos de sus peticiones programadas
+        self._users: dict[str, float] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        # Un único contexto SSL y conexiones keep-alive para reutilizar
+        # las sesiones TLS en lugar de negociar un handshake por llamada
+        self._connector = aiohttp.TCPConnector(
+            limit=TRANSPORT_CONNECTION_LIMIT,
+            limit_per_host=TRANSPORT_LIMIT_PER_HOST,
+            ttl_dns_cache=TRANSPORT_DNS_CACHE_TTL,
+            keepalive_timeout=TRANSPORT_KEEPALIVE_TIMEOUT,
+            ssl=ssl_util.get_default_context(),
+            enable_cleanup_closed=True,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self._connector,
+            headers={"User-Agent": SERVER_SOFTWARE},
+            timeout=aiohttp.ClientTimeout(total=TRANSPORT_REQUEST_TIMEOUT),
+            # El cliente descomprime él mismo para medir los bytes transferidos
+            auto_decompress=False,
+            response_class=TrackedResponse,
+            trace_configs=[self._build_trace_config()],
+        )
+
+        # Por si ninguna entrada llega a descargarse (p. ej. solo se usó el config flow)
+        self._unsub_close: CALLBACK_TYPE | None = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, self._async_shutdown
+        )
+
+    @property
+    def open_connections(self) -> int:
+        """Return the number of sockets currently held by the connector."""
+        # aiohttp no expone estos contadores públicamente
+        idle = sum(len(conns) for conns in getattr(self._connector, "_conns", {}).values())
+        return idle + len(getattr(self._connector, "_acquired", ()))
+
+    @property
+    def keepalive_timeout(self) -> float:
+        """Return the seconds an idle connection is kept open."""
+        return self._connector._keepalive_timeout  # pylint: disable=protected-access
+
+    @callback
+    def acquire(self, user_id: str) -> None:
+        """Register a config entry as a user of the transport."""
+        self._users.setdefault(user_id, 0)
+
+    @callback
+    def set_request_gap(self, user_id: str, seconds: float) -> None:
+        """Set the most seconds between two scheduled requests of a user.
+
+        Idle connections are kept open long enough to be reused by the next
+        scheduled request of the user with the shortest gap, within limits.
+        """
+        self._users[user_id] = seconds
+        self._update_keepalive()
+
+    @callback
+    def release(self, user_id: str) -> bool:
+        """Unregister a user, returning True when nobody uses the transport."""
+        self._users.pop(user_id, None)
+        self._update_keepalive()
+        return not self._users
+
+    @callback
+    def _update_keepalive(self) -> None:
+        """Adapt the keep-alive of idle connections to the users' request gaps."""
+        gap = min((gap for gap in self._users.values() if gap), default=0)
+        # aiohttp lo lee en cada liberación de conexión: basta con cambiarlo
+        self._connector._keepalive_timeout = min(  # pylint: disable=protected-access
+            max(gap, TRANSPORT_KEEPALIVE_TIMEOUT), TRANSPORT_MAX_KEEPALIVE_TIMEOUT
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return transport statistics for sensors and diagnostics."""
+        return {
+            **self.stats.as_dict(),
+            "open_connections": self.open_connections,
+            "connection_limit": TRANSPORT_CONNECTION_LIMIT,
+            "limit_per_host": TRANSPORT_LIMIT_PER_HOST,
+            "keepalive_timeout": self.keepalive_timeout,
+            "dns_cache_ttl": TRANSPORT_DNS_CACHE_TTL,
+            "users": len(self._users),
+            "requests_coalesced": self.coalescer.coalesced,
+        }
+
+    async def async_close(self) -> None:
+        """Drain in-flight requests and close the session."""
+        if self._unsub_close is not None:
+            self._unsub_close()
+            self._unsub_close = None
+        if self.session.closed:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), TRANSPORT_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "Closing HTTP transport with %s requests still in flight",
+                self.stats.in_flight,
+            )
+        await self.session.close()
+
+    async def _async_shutdown(self, _: Event) -> None:
+        """Close the transport when Home Assistant shuts down."""
+        # El listener de un solo uso ya se ha quitado
+        self._unsub_close = None
+        await self.async_close()
+
+    @callback
+    def _async_request_done(self) -> None:
+        """Free the in-flight slot of a finished request."""
+        self.stats.in_flight = max(self.stats.in_flight - 1, 0)
+        if not self.stats.in_flight:
+            self._idle.set()
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Build the trace hooks that feed TransportStats."""
+        stats = self.stats
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceRequestStartParams,
+        ) -> None:
+            stats.requests += 1
+            stats.in_flight += 1
+            self._idle.clear()
+
+        async def on_request_end(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceRequestEndParams,
+        ) -> None:
+            # Solo han llegado las cabeceras: la petición acaba al leer el cuerpo
+            if isinstance(params.response, TrackedResponse) and not params.response.closed:
+                params.response.on_release = self._async_request_done
+            else:
+                self._async_request_done()
+
+        async def on_request_exception(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceRequestExceptionParams,
+        ) -> None:
+            self._async_request_done()
+
+        async def on_dns_start(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceDnsResolveHostStartParams,
+        ) -> None:
+            ctx.dns_start = monotonic()
+
+        async def on_dns_end(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceDnsResolveHostEndParams,
+        ) -> None:
+            elapsed = (monotonic() - ctx.dns_start) * 1000
+            stats.dns_lookups += 1
+            stats.dns_time_last_ms = elapsed
+            stats.dns_time_total_ms += elapsed
+
+        async def on_dns_cache_hit(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceDnsCacheHitParams,
+        ) -> None:
+            stats.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceDnsCacheMissParams,
+        ) -> None:
+            stats.dns_cache_misses += 1
+
+        async def on_connection_create_start(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceConnectionCreateStartParams,
+        ) -> None:
+            ctx.connect_start = monotonic()
+
+        async def on_connection_create_end(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceConnectionCreateEndParams,
+        ) -> None:
+            elapsed = (monotonic() - ctx.connect_start) * 1000
+            stats.connections_created += 1
+            stats.connect_time_last_ms = elapsed
+            stats.connect_time_total_ms += elapsed
+
+        async def on_connection_reuseconn(
+            session: aiohttp.ClientSession,
+            ctx: SimpleNamespace,
+            params: aiohttp.TraceConnectionReuseconnParams,
+        ) -> None:
+            stats.connections_reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_dns_resolvehost_start.append(on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_end)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+
+@callback
+def async_get_transport(hass: HomeAssistant) -> GoogleMapsWeatherTransport:
+    """Return the shared transport, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    transport: GoogleMapsWeatherTransport | None = domain_data.get(DATA_TRANSPORT)
+    if transport is not None and not transport.session.closed:
+        return transport
+
+    transport = domain_data[DATA_TRANSPORT] = GoogleMapsWeatherTransport(hass)
+    return transport
+
+
+async def async_release_transport(hass: HomeAssistant, user_id: str) -> None:
+    """Release the transport for a user and close it when unused."""
+    domain_data = hass.data.get(DOMAIN, {})
+    transport: GoogleMapsWeatherTransport | None = domain_data.get(DATA_TRANSPORT)
+    if transport is None or not transport.release(user_id):
+        return
+    domain_data.pop(DATA_TRANSPORT)
+    await transport.async_close()
+
+
+def _round(value: float | None) -> float | None:
+    """Round a millisecond value for display."""
+    return round(value, 1) if value is not None else None
+
+
+def _avg(total: float, count: int) -> float | None:
+    """Return the average of a running total."""
+    return round(total / count, 1) if count else None
@@ -0,0 +1,135 @@
+"""Real API call accounting for Google Maps Weather."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import hashlib
+import logging
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_USAGE,
+    DOMAIN,
+    ENDPOINTS,
+    USAGE_BILLING_TIME_ZONE,
+    USAGE_SAVE_DELAY,
+    USAGE_STORAGE_KEY,
+    USAGE_STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class UsageTracker:
+    """Calls made to the API this month, by API key and endpoint.
+
+    Shared by every config entry and the config flow, so calls made with the
+    same key from several entries add up. Keys are stored hashed.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the tracker."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, USAGE_STORAGE_VERSION, USAGE_STORAGE_KEY, private=True
+        )
+        self.month = _current_month()
+        self._calls: dict[str, dict[str, int]] = {}
+        self._previous: dict[str, int] = {}
+        self._listeners: list[Callable[[], None]] = []
+
+    async def async_load(self) -> None:
+        """Load the counters from disk."""
+        stored = await self._store.async_load() or {}
+        self._previous = stored.get("previous_month_totals", {})
+        if stored.get("month") == self.month:
+            self._calls = stored.get("calls", {})
+        elif stored.get("calls"):
+            # El mes cambió con Home Assistant apagado
+            self._previous = _totals(stored["calls"])
+
+    def calls(self, api_key: str) -> dict[str, int]:
+        """Return this month's calls of an API key by endpoint."""
+        self._check_month()
+        calls = self._calls.get(key_id(api_key), {})
+        return {endpoint: calls.get(endpoint, 0) for endpoint in ENDPOINTS}
+
+    def total(self, api_key: str) -> int:
+        """Return this month's calls of an API key."""
+        return sum(self.calls(api_key).values())
+
+    def previous_month_total(self, api_key: str) -> int | None:
+        """Return last month's calls of an API key."""
+        self._check_month()
+        return self._previous.get(key_id(api_key))
+
+    @callback
+    def async_record(self, api_key: str, endpoint: str) -> None:
+        """Count an outgoing request."""
+        self._check_month()
+        calls = self._calls.setdefault(key_id(api_key), {})
+        calls[endpoint] = calls.get(endpoint, 0) + 1
+        self._store.async_delay_save(self._data_to_save, USAGE_SAVE_DELAY)
+        for listener in list(self._listeners):
+            listener()
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call listener after every counted request."""
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    def _check_month(self) -> None:
+        """Start new counters when the month changes."""
+        month = _current_month()
+        if month == self.month:
+            return
+        _LOGGER.debug("Nuevo mes de facturación %s: contadores a cero", month)
+        self._previous = _totals(self._calls)
+        self._calls = {}
+        self.month = month
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {
+            "month": self.month,
+            "calls": self._calls,
+            "previous_month_totals": self._previous,
+        }
+
+
+async def async_get_usage(hass: HomeAssistant) -> UsageTracker:
+    """Return the shared usage tracker, loading it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (usage := domain_data.get(DATA_USAGE)) is None:
+        usage = UsageTracker(hass)
+        await usage.async_load()
+        # Otra llamada pudo crearlo mientras se cargaba
+        usage = domain_data.setdefault(DATA_USAGE, usage)
+    return usage
+
+
+def key_id(api_key: str) -> str:
+    """Return the identifier under which the calls of a key are stored."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def _current_month() -> str:
+    """Return the billing month, as YYYY-MM in Pacific time.
+
+    Google bills the calls of each calendar month in Pacific time.
+    """
+    return dt_util.now(dt_util.get_time_zone(USAGE_BILLING_TIME_ZONE)).strftime("%Y-%m")
+
+
+def _totals(calls: dict[str, dict[str, int]]) -> dict[str, int]:
+    """Return the total calls of each key."""
+    return {key: sum(endpoints.values()) for key, endpoints in calls.items()}